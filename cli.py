@@ -13,11 +13,12 @@ import threading
 import subprocess
 
 from src.scraper.scraper import scrape_all_threads
-from video_maker import create_all_stacked_reddit_scroll_videos
+from src.render_service.client import RenderClient, format_event
 from src.youtube.youtube_upload import (
     YoutubeUploader,
     YoutubePostHistoryManager,
     extract_metadata_from_folder,
+    video_passed_qa,
 )
 
 with open("config/reddit_threads.json", "r") as f:
@@ -84,6 +85,28 @@ def cmd_scrape(args):
         print(f"ERROR: {e}")
 
 
+def make_videos_with_service(client, count, stop_flag):
+    """Submit jobs to the render service one at a time and follow their progress."""
+    made = 0
+    while not count or made < count:
+        if stop_flag.is_set():
+            break
+        if count:
+            print(f"\n--- Video {made+1} of {count} ---")
+        job = client.run_job(
+            on_event=lambda event: print(format_event(event)), stop_flag=stop_flag
+        )
+        if stop_flag.is_set():
+            break
+        if job["status"] != "done":
+            if job["error"] == "no_eligible_posts":
+                print("[!] No more usable posts available. Stopping.")
+            else:
+                print(f"[!] Render failed: {job['error']}")
+            break
+        made += 1
+
+
 def cmd_make(args):
     """Generate videos from scraped posts."""
     print("=" * 50)
@@ -96,7 +119,17 @@ def cmd_make(args):
 
     stop_flag = threading.Event()
     try:
-        if args.count:
+        client = RenderClient()
+        use_service = not args.local and client.is_available()
+        if not use_service:
+            # Renders narrate in this process; the TTS_WORKERS pool has to
+            # fork before anything starts threads
+            from src.narration.parallel_narration import start_parallel_narrator
+            start_parallel_narrator()
+        if use_service:
+            print(f"Using render service at {client.url}")
+            make_videos_with_service(client, args.count, stop_flag)
+        elif args.count:
             from video_maker import create_stacked_reddit_scroll_video, create_metadata, compile_video_and_metadata, cleanup_temp_files
             for i in range(args.count):
                 if stop_flag.is_set():
@@ -114,6 +147,7 @@ def cmd_make(args):
                 compile_video_and_metadata(narrated_video_path, metadata_dict, "final_vids")
                 cleanup_temp_files()
         else:
+            from video_maker import create_all_stacked_reddit_scroll_videos
             create_all_stacked_reddit_scroll_videos(output_dir="final_vids", stop_flag=stop_flag)
         print("=" * 50)
         print("VIDEO GENERATION COMPLETE")
@@ -138,6 +172,7 @@ def cmd_upload(args):
 
     # filter to unposted videos by checking reddit_url in metadata
     unposted_subfolders = []
+    qa_failed_count = 0
     for subfolder in all_subfolders:
         subfolder_path = os.path.join(videos_folder, subfolder)
         metadata = extract_metadata_from_folder(subfolder_path)
@@ -145,8 +180,14 @@ def cmd_upload(args):
             continue
         reddit_url = metadata.get("reddit_url", "")
         if reddit_url and not post_history_module.post_exists(reddit_url):
+            if not video_passed_qa(metadata):
+                qa_failed_count += 1
+                continue
             unposted_subfolders.append((subfolder, metadata))
 
+    if qa_failed_count:
+        print(f"Skipping {qa_failed_count} unposted videos that failed output QA")
+
     if not unposted_subfolders:
         print("No unposted videos found.")
         return
@@ -231,6 +272,8 @@ def cmd_list(args):
             status = "UPLOADED"
         elif not reddit_url:
             status = "NO URL"
+        elif not video_passed_qa(metadata):
+            status = "QA FAIL"
         else:
             status = "PENDING"
 
@@ -270,6 +313,26 @@ def cmd_auth(args):
         print(f"ERROR: Authentication failed - {e}")
 
 
+def cmd_serve(args):
+    """Run the local render service that make/cron/GUI submit jobs to."""
+    from src.render_service.server import serve
+
+    print("\n" + "=" * 50)
+    print("STARTING RENDER SERVICE")
+    print("=" * 50)
+    serve(host=args.host, port=args.port, workers=args.workers)
+
+
+def cmd_tts_serve(args):
+    """Run the TTS daemon that keeps one Kokoro model warm for every narration."""
+    from src.narration.tts_engine import serve
+
+    print("\n" + "=" * 50)
+    print("STARTING TTS DAEMON")
+    print("=" * 50)
+    serve()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Slop Media Machine CLI",
@@ -280,6 +343,8 @@ Examples:
   python cli.py scrape             Scrape Reddit (default 100 posts total)
   python cli.py scrape -c 50       Scrape 50 posts total across all threads
   python cli.py make               Generate videos continuously
+  python cli.py serve              Run the render service that make/cron/GUI use
+  python cli.py tts-serve          Keep one TTS model warm for every narration
   python cli.py list               List all videos and upload status
   python cli.py upload             Select and upload the best-scored video
   python cli.py upload -y          Upload without confirmation
@@ -307,8 +372,32 @@ Examples:
         "-c", "--count", type=int, default=None,
         help="Number of videos to create (default: unlimited)"
     )
+    make_parser.add_argument(
+        "--local", action="store_true",
+        help="Render in this process even if the render service is running"
+    )
     make_parser.set_defaults(func=cmd_make)
 
+    # serve command
+    serve_parser = subparsers.add_parser("serve", help="Run the local render service")
+    serve_parser.add_argument(
+        "--host", default="127.0.0.1",
+        help="Interface to listen on (default: 127.0.0.1)"
+    )
+    serve_parser.add_argument(
+        "--port", type=int, default=8765,
+        help="Port to listen on (default: 8765)"
+    )
+    serve_parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Jobs rendered at once (default: 1, renders share temp/)"
+    )
+    serve_parser.set_defaults(func=cmd_serve)
+
+    # tts-serve command
+    tts_parser = subparsers.add_parser("tts-serve", help="Run the local TTS daemon")
+    tts_parser.set_defaults(func=cmd_tts_serve)
+
     # list command
     list_parser = subparsers.add_parser("list", help="List all videos and their status")
     list_parser.set_defaults(func=cmd_list)
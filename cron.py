@@ -24,16 +24,13 @@ from pathlib import Path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.scraper.scraper import scrape_all_threads, DataSaver
-from video_maker import (
-    create_stacked_reddit_scroll_video,
-    create_metadata,
-    compile_video_and_metadata,
-    PostUsageHistory,
-)
+from src.scraper.post_usage_history import PostUsageHistory
+from src.render_service.client import RenderClient, format_event
 from src.youtube.youtube_upload import (
     YoutubeUploader,
     YoutubePostHistoryManager,
     extract_metadata_from_folder,
+    video_passed_qa,
 )
 
 
@@ -139,7 +136,7 @@ def count_unused_posts():
 
 
 def count_unposted_videos():
-    """Count videos in final_vids that haven't been uploaded yet."""
+    """Count videos in final_vids that haven't been uploaded yet and passed output QA."""
     if not os.path.exists(FINAL_VIDS_DIR):
         os.makedirs(FINAL_VIDS_DIR, exist_ok=True)
         return 0, 0
@@ -155,7 +152,7 @@ def count_unposted_videos():
         if metadata is False:
             continue
         reddit_url = metadata.get("reddit_url", "")
-        if reddit_url and not post_history.post_exists(reddit_url):
+        if reddit_url and not post_history.post_exists(reddit_url) and video_passed_qa(metadata):
             unposted += 1
 
     return unposted, len(subfolders)
@@ -174,11 +171,38 @@ def run_scraper(logger):
         return False
 
 
+def create_video_with_service(logger, client):
+    """Render a single video on the render service, logging its progress."""
+    def on_event(event):
+        if event["type"] == "status" or event["state"] == "done":
+            logger.log(format_event(event))
+
+    job = client.run_job(
+        options={"output_dir": FINAL_VIDS_DIR}, on_event=on_event, stop_flag=stop_flag
+    )
+    if job["status"] != "done":
+        logger.log(f"[VIDEO] Render service job failed: {job['error']}")
+        return False
+    logger.log(f"[VIDEO] Created video for: {job['result']['title'][:50]}...")
+    return True
+
+
 def create_video(logger):
     """Create a single video."""
     logger.log("[VIDEO] Starting video creation...")
 
     try:
+        client = RenderClient()
+        if client.is_available():
+            return create_video_with_service(logger, client)
+
+        # only the in-process path pays for importing the render modules
+        from video_maker import (
+            create_stacked_reddit_scroll_video,
+            create_metadata,
+            compile_video_and_metadata,
+        )
+
         result = create_stacked_reddit_scroll_video(FINAL_VIDS_DIR)
         if result is False:
             logger.log("[VIDEO] Failed to create video (no valid posts?)")
@@ -216,6 +240,9 @@ def upload_video(logger, state):
                 continue
             reddit_url = metadata.get("reddit_url", "")
             if reddit_url and not post_history.post_exists(reddit_url):
+                if not video_passed_qa(metadata):
+                    logger.log(f"[UPLOAD] Skipping {subfolder}, failed output QA: {metadata['qa'].get('failures')}")
+                    continue
                 unposted.append((subfolder_path, metadata))
 
         if not unposted:
@@ -259,6 +286,12 @@ def main_loop():
     logger.log("CRON JOB STARTED")
     logger.log("=" * 60)
 
+    # Renders narrate in this process while the render service is down; the
+    # TTS_WORKERS pool has to fork now, before anything starts threads
+    if not RenderClient().is_available():
+        from src.narration.parallel_narration import start_parallel_narrator
+        start_parallel_narrator()
+
     while not stop_flag.is_set():
         try:
             # Check status
@@ -13,11 +13,12 @@ from src.scraper.scraper import scrape_all_threads
 
 with open("config/reddit_threads.json", "r") as f:
     SUBREDDITS = json.load(f)
-from video_maker import create_all_stacked_reddit_scroll_videos
+from src.render_service.client import RenderClient, format_event
 from src.youtube.youtube_upload import (
     YoutubeUploader,
     YoutubePostHistoryManager,
     extract_metadata_from_folder,
+    video_passed_qa,
 )
 
 
@@ -415,11 +416,17 @@ class VideoTab(tk.Frame):
                 self.controller.stderr_redirector.register_thread(self.terminal)
 
             try:
-                create_all_stacked_reddit_scroll_videos(
-                    output_dir=r"final_vids",
-                    stop_flag=self.stop_flag,
-                    register_thread_callback=register_child_thread,
-                )
+                client = RenderClient()
+                if client.is_available():
+                    print(f"Using render service at {client.url}")
+                    self.generate_with_service(client)
+                else:
+                    from video_maker import create_all_stacked_reddit_scroll_videos
+                    create_all_stacked_reddit_scroll_videos(
+                        output_dir=r"final_vids",
+                        stop_flag=self.stop_flag,
+                        register_thread_callback=register_child_thread,
+                    )
                 print("="*50)
                 print("VIDEO GENERATION STOPPED" if self.stop_flag.is_set() else "VIDEO GENERATION COMPLETE")
                 print("="*50)
@@ -430,6 +437,23 @@ class VideoTab(tk.Frame):
 
         threading.Thread(target=run).start()
 
+    def generate_with_service(self, client):
+        """Keep submitting jobs to the render service until stopped or out of posts."""
+        def on_event(event):
+            print(format_event(event))
+            if event["type"] == "stage":
+                self.status_label.config(
+                    text=f"Rendering: {event['stage']} ({event['percent']:.0f}%)", fg="yellow"
+                )
+
+        while not self.stop_flag.is_set():
+            job = client.run_job(on_event=on_event, stop_flag=self.stop_flag)
+            if self.stop_flag.is_set():
+                break
+            if job["status"] != "done":
+                print(f"[!] Render stopped: {job['error']}")
+                break
+
     def stop_generation(self):
         self.stop_flag.set()
         print("STOP signal sent to video generation...")
@@ -551,6 +575,9 @@ class UploadTab(tk.Frame):
                     continue
                 reddit_url = metadata.get("reddit_url", "")
                 if reddit_url and not post_history_module.post_exists(reddit_url):
+                    if not video_passed_qa(metadata):
+                        self.log(f"Skipping {subfolder}: failed output QA")
+                        continue
                     unposted_subfolders.append((subfolder, metadata))
 
             if not unposted_subfolders:
@@ -5,6 +5,12 @@ python3 -m kokoro --text "The sky above the port was the color of television, tu
 echo "Bom dia mundo, como vão vocês" > text.txt
 python3 -m kokoro -i text.txt -l p --voice pm_alex > audio.wav
 
+Bulk mode, one {"id", "text", "voice", "speed"} object per line (voice and
+speed optional), rerunnable: finished ids in the manifest are skipped.
+Every narration also goes into the app's narration cache, so renders of
+the same text, voice and speed need no model work:
+python -m narration.kokoro batch posts.jsonl -o narrations/ --workers 4
+
 Common issues:
 pip not installed: `uv pip install pip`
 (Temporary workaround while https://github.com/explosion/spaCy/issues/13747 is not fixed)
@@ -13,9 +19,16 @@ espeak not installed: `apt-get install espeak-ng`
 """
 
 import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
 import wave
 from pathlib import Path
-from typing import Generator, TYPE_CHECKING
+from typing import Dict, Generator, List, Optional, Set, TYPE_CHECKING
 
 import numpy as np
 from loguru import logger
@@ -33,13 +46,13 @@ languages = [
 ]
 
 if TYPE_CHECKING:
-    from kokoro import KPipeline
+    from .pipeline import KPipeline
 
 
 def generate_audio(
     text: str, kokoro_language: str, voice: str, speed=1
 ) -> Generator["KPipeline.Result", None, None]:
-    from kokoro import KPipeline
+    from .pipeline import KPipeline
 
     if not voice.startswith(kokoro_language):
         logger.warning(f"Voice {voice} is not made for language {kokoro_language}")
@@ -65,7 +78,224 @@ def generate_and_save_audio(
             wav_file.writeframes(audio_bytes)
 
 
+SAMPLE_RATE = 24000
+MANIFEST_NAME = "manifest.jsonl"
+
+# Set in each batch worker by _init_batch_worker
+_batch_pipeline = None
+
+
+def _init_batch_worker(lang_code: str, threads: int) -> None:
+    global _batch_pipeline
+    import torch
+
+    from src.narration.tts_engine import REPO_ID, TTS_PRECISION, TTS_STFT_BACKEND
+    from .model import KModel
+    from .pipeline import KPipeline
+
+    torch.set_num_threads(threads)
+    # the app's engine settings, so the audio matches the cache's MODEL_REVISION
+    model = KModel(
+        repo_id=REPO_ID, precision=TTS_PRECISION, stft_backend=TTS_STFT_BACKEND
+    ).freeze_for_inference()
+    _batch_pipeline = KPipeline(lang_code=lang_code, repo_id=REPO_ID, model=model)
+
+
+def _cache_narration(text: str, item: Dict, chunks: List[np.ndarray], chunk_offsets: List[float], words: List[Dict]) -> Optional[str]:
+    """Stores a narration in the app's narration cache. Returns its key, or None."""
+    from src.narration.narration_cache import narration_cache_key, store_cached_narration
+    from src.narration.tts_engine import TTS_BACKEND
+
+    if TTS_BACKEND != "torch":
+        # the key would claim the other backend's audio
+        return None
+    key = narration_cache_key(text, item["voice"], item["speed"])
+    audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    try:
+        store_cached_narration(key, audio, SAMPLE_RATE, chunk_offsets, words)
+    except OSError as e:
+        logger.warning(f"Could not cache {item['id']}: {e}")
+        return None
+    return key
+
+
+def _narrate_item(item: Dict, out_dir: str) -> Dict:
+    """
+    Narrates one item into out_dir/<file>.wav, writing int16 audio as each
+    chunk finishes, and into the narration cache. Returns its manifest entry.
+    """
+    from src.narration.narration_cache import remove_emojis_from_text
+
+    t = time.time()
+    # what plan_narration narrates, so the cache keys match
+    text = remove_emojis_from_text(item["text"])
+    path = os.path.join(out_dir, f"{item['file']}.wav")
+    tmp_path = f"{path}.part"
+    samples = 0
+    chunks, chunk_offsets, words = [], [], []
+    try:
+        with wave.open(tmp_path, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            for result in _batch_pipeline(text, voice=item["voice"], speed=item["speed"]):
+                if result.audio is None:
+                    continue
+                offset = samples / SAMPLE_RATE
+                for token in result.tokens or []:
+                    if token.start_ts is not None and token.end_ts is not None:
+                        words.append({
+                            "word": token.text,
+                            "start": offset + token.start_ts,
+                            "end": offset + token.end_ts,
+                        })
+                audio = result.audio.numpy()
+                wav_file.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+                chunks.append(audio)
+                chunk_offsets.append(offset)
+                samples += len(audio)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {
+        "id": item["id"],
+        "path": path,
+        "duration": samples / SAMPLE_RATE,
+        "voice": item["voice"],
+        "speed": item["speed"],
+        "cache_key": _cache_narration(text, item, chunks, chunk_offsets, words),
+        "words": [dict(w, start=round(w["start"], 3), end=round(w["end"], 3)) for w in words],
+        "seconds": round(time.time() - t, 2),
+    }
+
+
+def _narrate_item_safe(item: Dict, out_dir: str) -> Dict:
+    try:
+        return _narrate_item(item, out_dir)
+    except Exception as e:
+        return {"id": item["id"], "error": f"{type(e).__name__}: {e}"}
+
+
+def _narrate_item_star(args) -> Dict:
+    return _narrate_item_safe(*args)
+
+
+def safe_file_name(item_id: str) -> str:
+    """item_id reduced to characters that are safe in a file name."""
+    name = re.sub(r"[^\w.-]+", "_", item_id).strip("._")
+    return name or hashlib.sha1(item_id.encode("utf-8")).hexdigest()[:12]
+
+
+def read_batch(input_file: Path, voice: str, speed: float) -> List[Dict]:
+    """Items to narrate. Ids that repeat (or collide once made file-safe) keep their first line."""
+    items = []
+    files = set()
+    with open(input_file, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "id" not in item or "text" not in item:
+                raise ValueError(f"{input_file}:{line_number} needs 'id' and 'text'")
+            item_id = str(item["id"])
+            file_name = safe_file_name(item_id)
+            if file_name in files:
+                logger.warning(f"{input_file}:{line_number} repeats id {item_id!r}, skipping it")
+                continue
+            files.add(file_name)
+            items.append({
+                "id": item_id,
+                "file": file_name,
+                "text": item["text"],
+                "voice": item.get("voice") or voice,
+                "speed": float(item.get("speed") or speed),
+            })
+    return items
+
+
+def finished_ids(manifest_path: str) -> Set[str]:
+    """Ids with a manifest entry and an existing wav, so a rerun can skip them."""
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut off by an interrupted run
+            if "error" not in entry and os.path.exists(entry.get("path", "")):
+                done.add(entry["id"])
+    return done
+
+
+def batch_main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m narration.kokoro batch",
+        description="Narrate a JSONL file of {id, text, voice, speed} with a pool of warm workers",
+    )
+    parser.add_argument("input_file", type=Path, help="JSONL input, one item per line")
+    parser.add_argument("-o", "--output-dir", type=Path, required=True, help="Where wavs and manifest.jsonl go")
+    parser.add_argument("-m", "--voice", default=None, help="Voice for items without one (default: the renders' voice)")
+    parser.add_argument("-l", "--language", default="a", choices=languages)
+    parser.add_argument("-s", "--speed", type=float, default=1.0, help="Speed for items without one")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Worker processes, each with its own model")
+    args = parser.parse_args(argv)
+    if args.voice is None:
+        from src.narration.tts_engine import NARRATION_VOICE
+
+        args.voice = NARRATION_VOICE
+
+    out_dir = str(args.output_dir.resolve())
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    items = read_batch(args.input_file, args.voice, args.speed)
+    done = finished_ids(manifest_path)
+    pending = [item for item in items if item["id"] not in done]
+    logger.info(f"{len(items)} items, {len(items) - len(pending)} already done, {len(pending)} to narrate")
+    if not pending:
+        return
+
+    workers = max(1, min(args.workers, len(pending)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    t = time.time()
+    audio_seconds = 0.0
+    failures = 0
+    with open(manifest_path, "a", encoding="utf-8") as manifest:
+        if workers == 1:
+            _init_batch_worker(args.language, threads)
+            entries = (_narrate_item_safe(item, out_dir) for item in pending)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers, _init_batch_worker, (args.language, threads))
+            entries = pool.imap_unordered(_narrate_item_star, [(item, out_dir) for item in pending])
+        try:
+            for i, entry in enumerate(entries, 1):
+                manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                manifest.flush()
+                if "error" in entry:
+                    failures += 1
+                    logger.error(f"[{i}/{len(pending)}] {entry['id']}: {entry['error']}")
+                else:
+                    audio_seconds += entry["duration"]
+                    logger.info(f"[{i}/{len(pending)}] {entry['id']}: {entry['duration']:.1f}s audio in {entry['seconds']}s")
+        finally:
+            if pool is not None:
+                pool.terminate()
+    elapsed = time.time() - t
+    logger.info(
+        f"Narrated {len(pending) - failures} items ({audio_seconds:.0f}s audio) in {elapsed:.0f}s"
+        f"{f', {failures} failed' if failures else ''}"
+    )
+
+
 def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        batch_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "-m",
@@ -126,7 +356,6 @@ def main() -> None:
         file: Path = args.input_file
         text = file.read_text()
     else:
-        import sys
         print("Press Ctrl+D to stop reading input and start generating", flush=True)
         text = '\n'.join(sys.stdin)
 
@@ -0,0 +1,303 @@
+"""Kokoro narration benchmark
+
+Runs a fixed corpus of Reddit-style story text through G2P and the model
+at several chunk lengths (in phonemes), voices and torch thread counts,
+and reports per-chunk latency, real-time factor, phonemes/s, peak RSS and
+where the time goes (G2P, ALBERT, prosody, text encoder, decoder, STFT).
+Results are written as JSON tagged with the git commit so runs can be
+compared across commits:
+
+python -m narration.kokoro.benchmark -o before.json
+python -m narration.kokoro.benchmark -o after.json --compare before.json
+"""
+
+from .istftnet import DEFAULT_STFT_BACKEND
+from .model import KModel
+from .pipeline import KPipeline
+from collections import defaultdict
+from loguru import logger
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import torch
+
+REPO_ID = 'hexgrad/Kokoro-82M'
+SAMPLE_RATE = 24000
+VOICES = ['jf_alpha', 'af_heart']
+CHUNK_LENGTHS = [64, 128, 256, 510]
+THREADS = [1, 4]
+REPEATS = 3
+CHUNKS_PER_LENGTH = 3
+
+CORPUS = [
+    "I never thought my neighbor would go that far over a parking spot, but here we are.",
+    "For context, we've shared a driveway for six years and never had a single problem.",
+    "Last Tuesday I came home from a twelve-hour shift and found a note taped to my windshield.",
+    "It said, in all caps, that I had exactly one day to stop \"stealing\" his space or he'd tow my car.",
+    "The thing is, the space is on my side of the property line. I have the survey to prove it.",
+    "So I did what any reasonable person would do: I printed the survey and left it in his mailbox.",
+    "The next morning my tires were flat. All four of them.",
+    "I called the police, filed a report, and installed a doorbell camera that same afternoon.",
+    "Two nights later the camera caught him walking up my driveway at 3 AM with a screwdriver.",
+    "My lawyer says I have a pretty strong case, but honestly I just want to park my car in peace.",
+    "AITA for sending the footage to our HOA group chat before talking to him first?",
+    "Update: he apologized, paid for the tires, and moved out a month later. Best $400 I never spent.",
+]
+
+# Model submodules timed per component (ModuleLists are timed per block).
+# predictor.forward isn't used at inference, so prosody hooks its parts.
+# decoder includes stft.
+COMPONENTS = {
+    'albert': ['bert', 'bert_encoder'],
+    'prosody': [
+        'predictor.text_encoder', 'predictor.lstm', 'predictor.duration_proj',
+        'predictor.shared', 'predictor.F0', 'predictor.N', 'predictor.F0_proj', 'predictor.N_proj',
+    ],
+    'text_encoder': ['text_encoder'],
+    'decoder': ['decoder'],
+}
+
+
+class ComponentTimer:
+    '''
+    Accumulates wall time per component with forward hooks on the model's
+    submodules, plus wrappers for the decoder's STFT transform/inverse
+    (plain method calls that hooks don't see).
+    '''
+
+    def __init__(self, model: KModel):
+        self.totals = defaultdict(float)
+        self._starts = {}
+        self._handles = []
+        for component, names in COMPONENTS.items():
+            for name in names:
+                module = model.get_submodule(name)
+                blocks = module.named_children() if isinstance(module, torch.nn.ModuleList) else [('', module)]
+                for index, block in blocks:
+                    key = f'{name}.{index}' if index else name
+                    self._handles.append(block.register_forward_pre_hook(self._start(key)))
+                    self._handles.append(block.register_forward_hook(self._stop(component, key)))
+        stft = model.decoder.generator.stft
+        for method in ('transform', 'inverse'):
+            setattr(stft, method, self._wrap('stft', getattr(stft, method)))
+        self._stft = stft
+
+    def _start(self, key):
+        def hook(module, args):
+            self._starts[key] = time.perf_counter()
+        return hook
+
+    def _stop(self, component, key):
+        def hook(module, args, output):
+            self.totals[component] += time.perf_counter() - self._starts.pop(key)
+        return hook
+
+    def _wrap(self, component, fn):
+        def timed(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.totals[component] += time.perf_counter() - t
+        return timed
+
+    def reset(self) -> None:
+        self.totals.clear()
+
+    def remove(self) -> None:
+        for handle in self._handles:
+            handle.remove()
+        for method in ('transform', 'inverse'):
+            self._stft.__dict__.pop(method, None)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def phonemize_corpus(pipeline: KPipeline) -> Dict:
+    '''G2P for every corpus sentence, uncached. Returns the phonemes and G2P timings.'''
+    pipeline.g2p(CORPUS[0])  # load lexicons/models before timing
+    phonemes, seconds = [], 0.0
+    for sentence in CORPUS:
+        t = time.perf_counter()
+        ps, _ = pipeline.g2p(sentence)
+        seconds += time.perf_counter() - t
+        phonemes.append(ps)
+    chars = sum(len(s) for s in CORPUS)
+    return {
+        'phonemes': ' '.join(phonemes),
+        'g2p_ms_per_sentence': seconds / len(CORPUS) * 1000,
+        'g2p_chars_per_s': chars / seconds,
+    }
+
+
+def make_chunks(phonemes: str, length: int, count: int = CHUNKS_PER_LENGTH) -> List[str]:
+    '''Up to count chunks of at most length phonemes, cut at spaces, cycling through the corpus.'''
+    words = phonemes.split(' ')
+    chunks, current, i = [], '', 0
+    while len(chunks) < count and i < len(words) * (count + 1):
+        word = words[i % len(words)]
+        i += 1
+        if current and len(current) + 1 + len(word) > length:
+            chunks.append(current)
+            current = ''
+        current = f'{current} {word}' if current else word[:length]
+    return chunks
+
+
+def benchmark_config(
+    model: KModel,
+    timer: ComponentTimer,
+    ref_pack: torch.FloatTensor,
+    chunks: List[str],
+    repeats: int
+) -> Dict:
+    model(chunks[0], ref_pack[len(chunks[0])-1])  # warm up this shape range
+    latencies, audio_seconds, phoneme_count = [], 0.0, 0
+    timer.reset()
+    for _ in range(repeats):
+        for ps in chunks:
+            t = time.perf_counter()
+            audio = model(ps, ref_pack[len(ps)-1])
+            latencies.append(time.perf_counter() - t)
+            audio_seconds += audio.shape[-1] / SAMPLE_RATE
+            phoneme_count += len(ps)
+    total = sum(latencies)
+    runs = len(latencies)
+    return {
+        'chunks': len(chunks),
+        'mean_phonemes': phoneme_count / runs,
+        'latency_ms_median': statistics.median(latencies) * 1000,
+        'latency_ms_max': max(latencies) * 1000,
+        'rtf': total / audio_seconds,
+        'phonemes_per_s': phoneme_count / total,
+        'components_ms': {k: v / runs * 1000 for k, v in sorted(timer.totals.items())},
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run(
+    voices: List[str] = VOICES,
+    chunk_lengths: List[int] = CHUNK_LENGTHS,
+    threads: List[int] = THREADS,
+    repeats: int = REPEATS,
+    precision: str = 'fp32',
+    stft_backend: Optional[str] = None
+) -> Dict:
+    t = time.perf_counter()
+    model = KModel(repo_id=REPO_ID, precision=precision, stft_backend=stft_backend).freeze_for_inference()
+    load_seconds = time.perf_counter() - t
+    pipeline = KPipeline(lang_code='a', repo_id=REPO_ID, model=model)
+    g2p = phonemize_corpus(pipeline)
+    timer = ComponentTimer(model)
+
+    results = []
+    try:
+        for n in threads:
+            torch.set_num_threads(n)
+            for voice in voices:
+                pack = pipeline.load_voice(voice)
+                for length in chunk_lengths:
+                    chunks = make_chunks(g2p['phonemes'], length)
+                    result = benchmark_config(model, timer, pack, chunks, repeats)
+                    result.update(threads=n, voice=voice, chunk_length=length)
+                    results.append(result)
+                    logger.info(
+                        f"threads={n} voice={voice} len={length}: "
+                        f"{result['latency_ms_median']:.0f} ms, RTF {result['rtf']:.3f}"
+                    )
+    finally:
+        timer.remove()
+
+    return {
+        'commit': git_commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'torch': torch.__version__,
+        'config': {
+            'precision': model.precision,
+            'stft_backend': stft_backend or DEFAULT_STFT_BACKEND,
+            'repeats': repeats,
+        },
+        'model_load_s': load_seconds,
+        'g2p_ms_per_sentence': g2p['g2p_ms_per_sentence'],
+        'g2p_chars_per_s': g2p['g2p_chars_per_s'],
+        'peak_rss_mb': peak_rss_mb(),
+        'results': results,
+    }
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None) -> None:
+    print(f"commit {report['commit']}, torch {report['torch']}, {report['cpu_count']} CPUs, {report['config']}")
+    print(f"model load {report['model_load_s']:.1f}s, G2P {report['g2p_ms_per_sentence']:.1f} ms/sentence, "
+          f"peak RSS {report['peak_rss_mb'] or 0:.0f} MB")
+    previous = {}
+    if baseline:
+        print(f"compared with commit {baseline['commit']}")
+        previous = {(r['threads'], r['voice'], r['chunk_length']): r for r in baseline['results']}
+
+    components = sorted({k for r in report['results'] for k in r['components_ms']})
+    header = f"{'thr':>3} {'voice':<9} {'len':>4} {'ms':>7} {'RTF':>6} {'ph/s':>7}"
+    header += ''.join(f" {c[:8]:>8}" for c in components)
+    print(header + (f" {'RTF Δ':>7}" if previous else ''))
+    for r in report['results']:
+        line = (f"{r['threads']:>3} {r['voice']:<9} {r['chunk_length']:>4} {r['latency_ms_median']:>7.0f} "
+                f"{r['rtf']:>6.3f} {r['phonemes_per_s']:>7.0f}")
+        line += ''.join(f" {r['components_ms'].get(c, 0):>8.1f}" for c in components)
+        old = previous.get((r['threads'], r['voice'], r['chunk_length']))
+        if old:
+            line += f" {(r['rtf'] - old['rtf']) / old['rtf']:>+7.1%}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark Kokoro narration')
+    parser.add_argument('--voices', nargs='+', default=VOICES)
+    parser.add_argument('--lengths', nargs='+', type=int, default=CHUNK_LENGTHS, help='Chunk lengths in phonemes')
+    parser.add_argument('--threads', nargs='+', type=int, default=THREADS)
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--precision', default='fp32', choices=KModel.PRECISIONS)
+    parser.add_argument('--stft-backend', choices=['torch', 'custom', 'fft'])
+    parser.add_argument('-o', '--output', type=str, help='Write results as JSON')
+    parser.add_argument('--compare', type=str, help='JSON from an earlier run to compare against')
+    args = parser.parse_args()
+
+    report = run(
+        voices=args.voices, chunk_lengths=args.lengths, threads=args.threads,
+        repeats=args.repeats, precision=args.precision, stft_backend=args.stft_backend
+    )
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as r:
+            baseline = json.load(r)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as w:
+            json.dump(report, w, indent=2)
+        logger.info(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
 # ADAPTED from https://github.com/yl4579/StyleTTS2/blob/main/Modules/istftnet.py
+from collections import OrderedDict
 from narration.kokoro.custom_stft import CustomSTFT
 from torch.nn.utils import weight_norm
+import json
 import math
+import os
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -180,6 +183,73 @@ class TorchSTFT(nn.Module):
         return reconstruction
 
 
+class FFTSTFT(nn.Module):
+    """
+    STFT/iSTFT on torch.fft.rfft/irfft with framing by unfold and overlap-add
+    by fold. Matches torch.stft/istft (center=True, reflect padding); the
+    istft window envelopes of the last ENVELOPE_CACHE_SIZE frame counts are
+    cached.
+    """
+
+    # Nearly every chunk has its own frame count, so the cache is an LRU
+    ENVELOPE_CACHE_SIZE = 16
+
+    def __init__(
+        self, filter_length=800, hop_length=200, win_length=800, window="hann"
+    ):
+        super().__init__()
+        self.filter_length = filter_length
+        self.hop_length = hop_length
+        self.win_length = win_length
+        assert window == "hann", window
+        assert win_length == filter_length, (win_length, filter_length)
+        self.register_buffer(
+            "window", torch.hann_window(win_length, periodic=True, dtype=torch.float32),
+            persistent=False,
+        )
+        self._envelopes = OrderedDict()
+
+    def transform(self, input_data):
+        pad = self.filter_length // 2
+        x = F.pad(input_data.unsqueeze(1), (pad, pad), mode="reflect").squeeze(1)
+        frames = x.unfold(-1, self.filter_length, self.hop_length) * self.window
+        spec = torch.fft.rfft(frames, dim=-1).transpose(1, 2)
+        return torch.abs(spec), torch.angle(spec)
+
+    def _envelope(self, n_frames, device):
+        key = (n_frames, device)
+        if key in self._envelopes:
+            self._envelopes.move_to_end(key)
+        else:
+            window_sq = (self.window.to(device) ** 2).reshape(1, -1, 1)
+            window_sq = window_sq.expand(1, -1, n_frames).contiguous()
+            self._envelopes[key] = self._overlap_add(window_sq, n_frames)
+            if len(self._envelopes) > self.ENVELOPE_CACHE_SIZE:
+                self._envelopes.popitem(last=False)
+        return self._envelopes[key]
+
+    def _overlap_add(self, frames, n_frames):
+        # frames: (B, filter_length, n_frames) -> (B, (n_frames-1)*hop + filter_length)
+        length = (n_frames - 1) * self.hop_length + self.filter_length
+        return F.fold(
+            frames, output_size=(1, length),
+            kernel_size=(1, self.filter_length), stride=(1, self.hop_length),
+        ).reshape(frames.shape[0], length)
+
+    def inverse(self, magnitude, phase):
+        n_frames = magnitude.shape[-1]
+        spec = torch.polar(magnitude, phase).transpose(1, 2)
+        frames = torch.fft.irfft(spec, n=self.filter_length, dim=-1) * self.window
+        waveform = self._overlap_add(frames.transpose(1, 2), n_frames)
+        waveform = waveform / self._envelope(n_frames, magnitude.device).clamp(min=1e-11)
+        pad = self.filter_length // 2
+        return waveform[:, pad:-pad].unsqueeze(-2)
+
+    def forward(self, input_data):
+        self.magnitude, self.phase = self.transform(input_data)
+        return self.inverse(self.magnitude, self.phase)
+
+
 class SineGen(nn.Module):
     """Definition of sine generator
     SineGen(samp_rate, harmonic_num = 0,
@@ -215,6 +285,12 @@ class SineGen(nn.Module):
         self.voiced_threshold = voiced_threshold
         self.flag_for_pulse = flag_for_pulse
         self.upsample_scale = upsample_scale
+        # multipliers for the fundamental and its overtones
+        self.register_buffer(
+            "harmonics",
+            torch.arange(1, self.dim + 1, dtype=torch.float32).view(1, 1, -1),
+            persistent=False,
+        )
 
     def _f02uv(self, f0):
         # generate uv signal
@@ -281,11 +357,8 @@ class SineGen(nn.Module):
         output sine_tensor: tensor(batchsize=1, length, dim)
         output uv: tensor(batchsize=1, length, 1)
         """
-        f0_buf = torch.zeros(f0.shape[0], f0.shape[1], self.dim, device=f0.device)
         # fundamental component
-        fn = torch.multiply(
-            f0, torch.FloatTensor([[range(1, self.harmonic_num + 2)]]).to(f0.device)
-        )
+        fn = torch.multiply(f0, self.harmonics)
         # generate sine waveforms
         sine_waves = self._f02sine(fn) * self.sine_amp
         # generate uv signal
@@ -302,6 +375,25 @@ class SineGen(nn.Module):
         sine_waves = sine_waves * uv + noise
         return sine_waves, uv, noise
 
+    def frame_rate_sines(self, f0_frames):
+        """Fast path for _f02sine on f0 that is constant over each
+        upsample_scale block (nearest-upsampled frames, as Generator feeds
+        it). _f02sine linearly downsamples its per-sample rad values back to
+        exactly these frame values, and its random initial phase only
+        touches sample 0, which that downsampling never reads, so the phase
+        is computed from the frames directly.
+        input f0_frames: tensor(batchsize, frames, 1)
+        output: sine_amp * sines, tensor(batchsize, dim, frames * upsample_scale)
+        """
+        rad_values = (f0_frames * self.harmonics / self.sampling_rate) % 1
+        phase = torch.cumsum(rad_values, dim=1) * 2 * torch.pi
+        phase = F.interpolate(
+            phase.transpose(1, 2) * self.upsample_scale,
+            scale_factor=self.upsample_scale,
+            mode="linear",
+        )
+        return torch.sin(phase) * self.sine_amp
+
 
 class SourceModuleHnNSF(nn.Module):
     """SourceModule for hn-nsf
@@ -345,6 +437,10 @@ class SourceModuleHnNSF(nn.Module):
         # to merge source harmonics into a single excitation
         self.l_linear = nn.Linear(harmonic_num + 1, 1)
         self.l_tanh = nn.Tanh()
+        # Generator uses excitation() when it can; False forces forward()
+        self.frame_rate_excitation = (
+            upsample_scale > 2 and not self.l_sin_gen.flag_for_pulse
+        )
 
     def forward(self, x):
         """
@@ -361,6 +457,58 @@ class SourceModuleHnNSF(nn.Module):
         noise = torch.randn_like(uv) * self.sine_amp / 3
         return sine_merge, noise, uv
 
+    def excitation(self, f0_frames, f0):
+        """
+        Fast path for forward(f0)[0], where f0 is f0_frames nearest-upsampled
+        by upsample_scale. The harmonics are computed at frame rate
+        (SineGen.frame_rate_sines) and merged without transposing them, and
+        the per-harmonic noise is drawn as a single channel: l_linear of
+        independent N(0, a^2) noise per harmonic is N(0, a^2 |w|^2), so this
+        matches forward in distribution rather than sample for sample.
+        f0_frames (batchsize, frames, 1), f0 (batchsize, length, 1)
+        Sine_source (batchsize, length, 1)
+        """
+        sin_gen = self.l_sin_gen
+        with torch.no_grad():
+            sines = sin_gen.frame_rate_sines(f0_frames)
+            uv = sin_gen._f02uv(f0)
+            noise_amp = uv * sin_gen.noise_std + (1 - uv) * sin_gen.sine_amp / 3
+        weight = self.l_linear.weight
+        merged = torch.matmul(weight, sines).transpose(1, 2) * uv + self.l_linear.bias
+        merged = merged + noise_amp * weight.norm() * torch.randn_like(uv)
+        return self.l_tanh(merged)
+
+
+# "custom" avoids complex ops (needed for ONNX export). tests/test_stft_backends.py
+# times all three, and with --record saves the result for this machine in
+# STFT_BENCHMARK_PATH; the default is the recorded winner, or "torch" without one.
+STFT_BACKENDS = {"torch": TorchSTFT, "custom": CustomSTFT, "fft": FFTSTFT}
+STFT_BENCHMARK_PATH = os.environ.get(
+    "KOKORO_STFT_BENCHMARK", os.path.join(os.path.dirname(os.path.abspath(__file__)), "stft_benchmark.json")
+)
+
+
+def recorded_stft_backend(path=STFT_BENCHMARK_PATH):
+    """The fastest backend from a recorded benchmark, or None if there is no usable record."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            fastest = json.load(f).get("fastest")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return fastest if fastest in STFT_BACKENDS else None
+
+
+def record_stft_benchmark(fastest, totals_ms, path=STFT_BENCHMARK_PATH):
+    """Saves a benchmark result for recorded_stft_backend to pick up."""
+    record = {"fastest": fastest, "totals_ms": totals_ms, "torch": torch.__version__}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+DEFAULT_STFT_BACKEND = recorded_stft_backend() or "torch"
+
 
 class Generator(nn.Module):
     def __init__(
@@ -374,6 +522,7 @@ class Generator(nn.Module):
         gen_istft_n_fft,
         gen_istft_hop_size,
         disable_complex=False,
+        stft_backend=None,
     ):
         super(Generator, self).__init__()
         self.num_kernels = len(resblock_kernel_sizes)
@@ -434,26 +583,26 @@ class Generator(nn.Module):
         self.ups.apply(init_weights)
         self.conv_post.apply(init_weights)
         self.reflection_pad = nn.ReflectionPad1d((1, 0))
-        self.stft = (
-            CustomSTFT(
-                filter_length=gen_istft_n_fft,
-                hop_length=gen_istft_hop_size,
-                win_length=gen_istft_n_fft,
-            )
-            if disable_complex
-            else TorchSTFT(
-                filter_length=gen_istft_n_fft,
-                hop_length=gen_istft_hop_size,
-                win_length=gen_istft_n_fft,
-            )
+        if stft_backend is None:
+            stft_backend = "custom" if disable_complex else DEFAULT_STFT_BACKEND
+        self.stft = STFT_BACKENDS[stft_backend](
+            filter_length=gen_istft_n_fft,
+            hop_length=gen_istft_hop_size,
+            win_length=gen_istft_n_fft,
         )
 
     def forward(self, x, s, f0):
         with torch.no_grad():
+            f0_frames = f0[:, :, None]
             f0 = self.f0_upsamp(f0[:, None]).transpose(1, 2)  # bs,n,t
-            har_source, noi_source, uv = self.m_source(f0)
+            if self.m_source.frame_rate_excitation:
+                har_source = self.m_source.excitation(f0_frames, f0)
+            else:
+                har_source, noi_source, uv = self.m_source(f0)
             har_source = har_source.transpose(1, 2).squeeze(1)
-            har_spec, har_phase = self.stft.transform(har_source)
+            # STFT has no bf16 kernels, keep it in fp32 under autocast
+            with torch.autocast(device_type=har_source.device.type, enabled=False):
+                har_spec, har_phase = self.stft.transform(har_source.float())
             har = torch.cat([har_spec, har_phase], dim=1)
         for i in range(self.num_upsamples):
             x = F.leaky_relu(x, negative_slope=0.1)
@@ -474,7 +623,8 @@ class Generator(nn.Module):
         x = self.conv_post(x)
         spec = torch.exp(x[:, : self.post_n_fft // 2 + 1, :])
         phase = torch.sin(x[:, self.post_n_fft // 2 + 1 :, :])
-        return self.stft.inverse(spec, phase)
+        with torch.autocast(device_type=x.device.type, enabled=False):
+            return self.stft.inverse(spec.float(), phase.float())
 
 
 class UpSample1d(nn.Module):
@@ -565,6 +715,7 @@ class Decoder(nn.Module):
         gen_istft_n_fft,
         gen_istft_hop_size,
         disable_complex=False,
+        stft_backend=None,
     ):
         super().__init__()
         self.encode = AdainResBlk1d(dim_in + 2, 1024, style_dim)
@@ -590,6 +741,7 @@ class Decoder(nn.Module):
             gen_istft_n_fft,
             gen_istft_hop_size,
             disable_complex=disable_complex,
+            stft_backend=stft_backend,
         )
 
     def forward(self, asr, F0_curve, N, s):
@@ -1,11 +1,17 @@
 from .istftnet import Decoder
 from .modules import CustomAlbert, ProsodyPredictor, TextEncoder
-from dataclasses import dataclass
-from huggingface_hub import hf_hub_download
+from .weights import convert_to_safetensors, load_state_dicts, resolve_file
+from dataclasses import dataclass, replace
 from loguru import logger
 from transformers import AlbertConfig
-from typing import Dict, Optional, Union
+from typing import Dict, List, Optional, Union
+from contextlib import contextmanager, nullcontext
+from torch.nn.utils import parametrize, remove_weight_norm
+import inspect
 import json
+import os
+import sys
+import time
 import torch
 
 class KModel(torch.nn.Module):
@@ -23,6 +29,15 @@ class KModel(torch.nn.Module):
     so there is no need to repeatedly download config.json outside of KModel.
     '''
 
+    PRECISIONS = ('fp32', 'int8', 'bf16')
+
+    # Dynamic int8 targets the Linear/LSTM-heavy text and duration front end;
+    # the conv decoder stays in fp32
+    INT8_MODULES = (
+        'bert', 'bert_encoder', 'text_encoder.lstm',
+        'predictor.text_encoder', 'predictor.lstm', 'predictor.shared',
+    )
+
     MODEL_NAMES = {
         'hexgrad/Kokoro-82M': 'kokoro-v1_0.pth',
         'hexgrad/Kokoro-82M-v1.1-zh': 'kokoro-v1_1-zh.pth',
@@ -33,9 +48,25 @@ class KModel(torch.nn.Module):
         repo_id: Optional[str] = None,
         config: Union[Dict, str, None] = None,
         model: Optional[str] = None,
-        disable_complex: bool = False
+        disable_complex: bool = False,
+        precision: str = 'fp32',
+        stft_backend: Optional[str] = None,
+        weights_dir: Optional[str] = None
     ):
+        '''
+        precision: 'fp32' (default), 'int8' for dynamic int8 quantization of
+        the front end's Linear and LSTM layers (CPU only), or 'bf16' for bf16
+        autocast on CPUs with native bf16 support (falls back to fp32).
+        stft_backend: 'torch', 'custom' or 'fft' for the decoder's STFT (see
+        istftnet.STFT_BACKENDS). Defaults to 'custom' with disable_complex and
+        to istftnet.DEFAULT_STFT_BACKEND (the recorded benchmark winner) otherwise.
+        weights_dir: directory to keep a memory-mappable safetensors
+        conversion of the checkpoint in (see weights.py). Without it the
+        checkpoint is loaded with torch.load. The time spent converting and
+        loading is kept in self.load_seconds.
+        '''
         super().__init__()
+        assert precision in KModel.PRECISIONS, (precision, KModel.PRECISIONS)
         if repo_id is None:
             repo_id = 'hexgrad/Kokoro-82M'
             print(f"WARNING: Defaulting repo_id to {repo_id}. Pass repo_id='{repo_id}' to suppress this warning.")
@@ -43,7 +74,7 @@ class KModel(torch.nn.Module):
         if not isinstance(config, dict):
             if not config:
                 logger.debug("No config provided, downloading from HF")
-                config = hf_hub_download(repo_id=repo_id, filename='config.json')
+                config = resolve_file(repo_id, 'config.json')
             with open(config, 'r', encoding='utf-8') as r:
                 config = json.load(r)
                 logger.debug(f"Loaded config: {config}")
@@ -61,18 +92,126 @@ class KModel(torch.nn.Module):
         )
         self.decoder = Decoder(
             dim_in=config['hidden_dim'], style_dim=config['style_dim'],
-            dim_out=config['n_mels'], disable_complex=disable_complex, **config['istftnet']
+            dim_out=config['n_mels'], disable_complex=disable_complex,
+            stft_backend=stft_backend, **config['istftnet']
         )
         if not model:
-            model = hf_hub_download(repo_id=repo_id, filename=KModel.MODEL_NAMES[repo_id])
-        for key, state_dict in torch.load(model, map_location='cpu', weights_only=True).items():
+            model = resolve_file(repo_id, KModel.MODEL_NAMES[repo_id])
+        t = time.time()
+        if weights_dir and not model.endswith('.safetensors'):
+            model = convert_to_safetensors(model, weights_dir) or model
+        # assign keeps the (memory-mapped) loaded tensors instead of copying them
+        assign = {'assign': True} if 'assign' in inspect.signature(torch.nn.Module.load_state_dict).parameters else {}
+        # Parameters backed by the mapped file, which forked processes share without copying
+        self.weights_mapped = bool(assign) and model.endswith('.safetensors')
+        for key, state_dict in load_state_dicts(model).items():
             assert hasattr(self, key), key
+            # Checkpoints are saved from DataParallel modules
+            if all(k.startswith('module.') for k in state_dict):
+                state_dict = {k[7:]: v for k, v in state_dict.items()}
             try:
-                getattr(self, key).load_state_dict(state_dict)
-            except:
+                getattr(self, key).load_state_dict(state_dict, **assign)
+            except RuntimeError:
                 logger.debug(f"Did not load {key} from state_dict")
-                state_dict = {k[7:]: v for k, v in state_dict.items()}
-                getattr(self, key).load_state_dict(state_dict, strict=False)
+                getattr(self, key).load_state_dict(state_dict, strict=False, **assign)
+        self.weights_file = model
+        self.load_seconds = time.time() - t
+        logger.info(f"Loaded {os.path.basename(model)} in {self.load_seconds:.2f}s")
+        if precision == 'bf16' and not KModel.cpu_supports_bf16():
+            logger.warning("CPU has no native bf16 support, using fp32")
+            precision = 'fp32'
+        self.precision = precision
+        self.frozen = False
+        if precision == 'int8':
+            torch.ao.quantization.quantize_dynamic(
+                self,
+                {name: torch.ao.quantization.default_dynamic_qconfig for name in KModel.INT8_MODULES},
+                dtype=torch.qint8,
+                inplace=True
+            )
+
+    @staticmethod
+    def cpu_supports_bf16() -> bool:
+        check = getattr(torch.cpu, '_is_avx512_bf16_supported', None)
+        return bool(check and check())
+
+    def autocast(self):
+        if self.precision == 'bf16':
+            return torch.autocast(device_type='cpu', dtype=torch.bfloat16)
+        return nullcontext()
+
+    @contextmanager
+    def inference(self):
+        '''Context for the phoneme-level entry points: autocast, plus inference_mode once frozen.'''
+        with torch.inference_mode(self.frozen), self.autocast():
+            yield
+
+    def freeze_for_inference(self) -> 'KModel':
+        '''
+        Eval-only fast path: folds weight_norm into plain weights (instead of
+        recomputing them from g and v on every call), swaps Dropout for
+        Identity, flattens LSTM weights and switches forward/predict/vocode
+        to inference_mode.
+        Irreversible, so only for models that will never be trained or
+        have weights loaded again. Returns self.
+        '''
+        if self.frozen:
+            return self
+        for module in list(self.modules()):
+            if hasattr(module, 'weight_g'):
+                remove_weight_norm(module)
+            elif parametrize.is_parametrized(module, 'weight'):
+                parametrize.remove_parametrizations(module, 'weight', leave_parametrized=True)
+            for name, child in list(module.named_children()):
+                if isinstance(child, torch.nn.Dropout):
+                    setattr(module, name, torch.nn.Identity())
+            # once, for the unpadded fast paths that don't call it per forward
+            if isinstance(module, torch.nn.LSTM):
+                module.flatten_parameters()
+        self.eval()
+        self.frozen = True
+        return self
+
+    def compile_for_inference(self, cache_dir: Optional[str] = None) -> 'KModel':
+        '''
+        Opt-in: runs the decoder and F0/N prediction through torch.compile
+        (inductor, dynamic shapes, so variable frame counts don't recompile)
+        to fuse their many small kernels. Compilation happens on the first
+        call; if it or any later compiled call fails, that part falls back
+        to eager for good. With cache_dir, inductor's compiled graphs are
+        kept there between runs. Call after freeze_for_inference. Returns self.
+        '''
+        if not hasattr(torch, 'compile'):
+            logger.warning("torch.compile needs torch 2.0+, staying eager")
+            return self
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            # inductor reads (and may memoize) its cache dir the first time
+            # it's used, so this has to happen before it's imported
+            if 'torch._inductor' in sys.modules:
+                logger.warning(f"Inductor already imported, {cache_dir} may not be used as its cache")
+            os.environ['TORCHINDUCTOR_CACHE_DIR'] = cache_dir
+            import torch._inductor.config as inductor_config
+            # the env var for this is only read when the config is imported
+            inductor_config.fx_graph_cache = True
+        self.decoder.forward = KModel._compile_with_fallback(self.decoder.forward, 'decoder')
+        self.predictor.F0Ntrain = KModel._compile_with_fallback(self.predictor.F0Ntrain, 'F0Ntrain')
+        return self
+
+    @staticmethod
+    def _compile_with_fallback(fn, name: str):
+        compiled = torch.compile(fn, backend='inductor', dynamic=True)
+
+        def run(*args, **kwargs):
+            nonlocal compiled
+            if compiled is not None:
+                try:
+                    return compiled(*args, **kwargs)
+                except Exception as e:
+                    logger.warning(f"Compiled {name} failed, falling back to eager: {e}")
+                    compiled = None
+            return fn(*args, **kwargs)
+        return run
 
     @property
     def device(self):
@@ -83,13 +222,45 @@ class KModel(torch.nn.Module):
         audio: torch.FloatTensor
         pred_dur: Optional[torch.LongTensor] = None
 
+    @dataclass
+    class DurationPrediction:
+        input_ids: torch.LongTensor
+        input_lengths: torch.LongTensor
+        text_mask: torch.BoolTensor
+        ref_s: torch.FloatTensor
+        d: torch.FloatTensor
+        duration: torch.FloatTensor  # per-token frames at speed 1, unrounded
+        pred_dur: torch.LongTensor
+
+        def at_speed(self, speed: float) -> 'KModel.DurationPrediction':
+            '''The same prediction rounded for another speed, without re-running the model.'''
+            return replace(self, pred_dur=KModel.round_durations(self.duration, speed))
+
+    @staticmethod
+    def round_durations(duration: torch.FloatTensor, speed: float) -> torch.LongTensor:
+        return torch.round(duration / speed).clamp(min=1).long().squeeze()
+
+    @staticmethod
+    def alignment_indices(pred_dur: torch.LongTensor) -> torch.LongTensor:
+        '''
+        Token index of every output frame. index_select with these along the
+        time axis gives exactly features @ one-hot alignment, without the
+        (tokens x frames) matrix or the matmul.
+        '''
+        return torch.repeat_interleave(torch.arange(pred_dur.shape[0], device=pred_dur.device), pred_dur)
+
     @torch.no_grad()
-    def forward_with_tokens(
+    def predict_durations(
         self,
         input_ids: torch.LongTensor,
         ref_s: torch.FloatTensor,
         speed: float = 1
-    ) -> tuple[torch.FloatTensor, torch.LongTensor]:
+    ) -> 'KModel.DurationPrediction':
+        '''
+        Phase one of forward_with_tokens: ALBERT plus the duration predictor.
+        Cheap next to the decoder, and enough to know the audio's exact
+        length (600 samples per pred_dur frame) and word timings.
+        '''
         input_lengths = torch.full(
             (input_ids.shape[0],), 
             input_ids.shape[-1], 
@@ -105,18 +276,77 @@ class KModel(torch.nn.Module):
         d = self.predictor.text_encoder(d_en, s, input_lengths, text_mask)
         x, _ = self.predictor.lstm(d)
         duration = self.predictor.duration_proj(x)
-        duration = torch.sigmoid(duration).sum(axis=-1) / speed
-        pred_dur = torch.round(duration).clamp(min=1).long().squeeze()
-        indices = torch.repeat_interleave(torch.arange(input_ids.shape[1], device=self.device), pred_dur)
-        pred_aln_trg = torch.zeros((input_ids.shape[1], indices.shape[0]), device=self.device)
-        pred_aln_trg[indices, torch.arange(indices.shape[0])] = 1
-        pred_aln_trg = pred_aln_trg.unsqueeze(0).to(self.device)
-        en = d.transpose(-1, -2) @ pred_aln_trg
+        duration = torch.sigmoid(duration).sum(axis=-1)
+        pred_dur = KModel.round_durations(duration, speed)
+        return self.DurationPrediction(
+            input_ids=input_ids, input_lengths=input_lengths, text_mask=text_mask,
+            ref_s=ref_s, d=d, duration=duration, pred_dur=pred_dur
+        )
+
+    @torch.no_grad()
+    def synthesize_from_durations(self, prediction: 'KModel.DurationPrediction') -> torch.FloatTensor:
+        '''Phase two of forward_with_tokens: F0/N prediction and the decoder.'''
+        s = prediction.ref_s[:, 128:]
+        indices = self.alignment_indices(prediction.pred_dur)
+        en = prediction.d.transpose(-1, -2).index_select(-1, indices)
         F0_pred, N_pred = self.predictor.F0Ntrain(en, s)
+        t_en = self.text_encoder(prediction.input_ids, prediction.input_lengths, prediction.text_mask)
+        asr = t_en.index_select(-1, indices)
+        return self.decoder(asr, F0_pred, N_pred, prediction.ref_s[:, :128]).squeeze()
+
+    @torch.no_grad()
+    def forward_with_tokens(
+        self,
+        input_ids: torch.LongTensor,
+        ref_s: torch.FloatTensor,
+        speed: float = 1
+    ) -> tuple[torch.FloatTensor, torch.LongTensor]:
+        prediction = self.predict_durations(input_ids, ref_s, speed)
+        audio = self.synthesize_from_durations(prediction)
+        return audio, prediction.pred_dur
+
+    @torch.no_grad()
+    def forward_batch_with_tokens(
+        self,
+        input_ids: torch.LongTensor,
+        input_lengths: torch.LongTensor,
+        ref_s: torch.FloatTensor,
+        speed: torch.FloatTensor
+    ) -> tuple[List[torch.FloatTensor], List[torch.LongTensor]]:
+        '''
+        Batched forward_with_tokens over right-padded input_ids [B, T] with
+        their real lengths [B] and per-item ref_s [B, 256] and speed [B].
+
+        The ALBERT, duration and text encoders run once for the whole batch
+        under the padding mask. Duration expansion, F0/N prediction and the
+        decoder run per item: their InstanceNorms normalize over time, so
+        padded frames would change the audio.
+        '''
+        text_mask = torch.arange(input_ids.shape[1], device=self.device).unsqueeze(0)
+        text_mask = torch.ge(text_mask, input_lengths.unsqueeze(1))
+        bert_dur = self.bert(input_ids, attention_mask=(~text_mask).int())
+        d_en = self.bert_encoder(bert_dur).transpose(-1, -2)
+        s = ref_s[:, 128:]
+        d = self.predictor.text_encoder(d_en, s, input_lengths, text_mask)
+        x = torch.nn.utils.rnn.pack_padded_sequence(
+            d, input_lengths.cpu(), batch_first=True, enforce_sorted=False
+        )
+        x, _ = self.predictor.lstm(x)
+        x, _ = torch.nn.utils.rnn.pad_packed_sequence(x, batch_first=True, total_length=input_ids.shape[1])
+        duration = self.predictor.duration_proj(x)
+        duration = torch.sigmoid(duration).sum(axis=-1) / speed.unsqueeze(1)
         t_en = self.text_encoder(input_ids, input_lengths, text_mask)
-        asr = t_en @ pred_aln_trg
-        audio = self.decoder(asr, F0_pred, N_pred, ref_s[:, :128]).squeeze()
-        return audio, pred_dur
+
+        audios, pred_durs = [], []
+        for i, length in enumerate(input_lengths.tolist()):
+            pred_dur = torch.round(duration[i, :length]).clamp(min=1).long()
+            indices = self.alignment_indices(pred_dur)
+            en = d[i:i+1, :length].transpose(-1, -2).index_select(-1, indices)
+            F0_pred, N_pred = self.predictor.F0Ntrain(en, s[i:i+1])
+            asr = t_en[i:i+1, :, :length].index_select(-1, indices)
+            audios.append(self.decoder(asr, F0_pred, N_pred, ref_s[i:i+1, :128]).squeeze())
+            pred_durs.append(pred_dur)
+        return audios, pred_durs
 
     def forward(
         self,
@@ -130,12 +360,52 @@ class KModel(torch.nn.Module):
         assert len(input_ids)+2 <= self.context_length, (len(input_ids)+2, self.context_length)
         input_ids = torch.LongTensor([[0, *input_ids, 0]]).to(self.device)
         ref_s = ref_s.to(self.device)
-        audio, pred_dur = self.forward_with_tokens(input_ids, ref_s, speed)
-        audio = audio.squeeze().cpu()
+        with self.inference():
+            audio, pred_dur = self.forward_with_tokens(input_ids, ref_s, speed)
+        audio = audio.squeeze().float().cpu()
         pred_dur = pred_dur.cpu() if pred_dur is not None else None
         logger.debug(f"pred_dur: {pred_dur}")
         return self.Output(audio=audio, pred_dur=pred_dur) if return_output else audio
 
+    def predict(
+        self,
+        phonemes: str,
+        ref_s: torch.FloatTensor,
+        speed: float = 1
+    ) -> 'KModel.DurationPrediction':
+        input_ids = list(filter(lambda i: i is not None, map(lambda p: self.vocab.get(p), phonemes)))
+        assert len(input_ids)+2 <= self.context_length, (len(input_ids)+2, self.context_length)
+        input_ids = torch.LongTensor([[0, *input_ids, 0]]).to(self.device)
+        with self.inference():
+            return self.predict_durations(input_ids, ref_s.to(self.device), speed)
+
+    def vocode(self, prediction: 'KModel.DurationPrediction') -> torch.FloatTensor:
+        with self.inference():
+            audio = self.synthesize_from_durations(prediction)
+        return audio.squeeze().float().cpu()
+
+    def forward_batch(
+        self,
+        phonemes: List[str],
+        ref_s: torch.FloatTensor,
+        speed: List[float]
+    ) -> List['KModel.Output']:
+        ids = []
+        for ps in phonemes:
+            input_ids = list(filter(lambda i: i is not None, map(lambda p: self.vocab.get(p), ps)))
+            assert len(input_ids)+2 <= self.context_length, (len(input_ids)+2, self.context_length)
+            ids.append([0, *input_ids, 0])
+        input_lengths = torch.LongTensor([len(i) for i in ids])
+        input_ids = torch.zeros((len(ids), int(input_lengths.max())), dtype=torch.long)
+        for i, item in enumerate(ids):
+            input_ids[i, :len(item)] = torch.LongTensor(item)
+        with self.inference():
+            audios, pred_durs = self.forward_batch_with_tokens(
+                input_ids.to(self.device), input_lengths.to(self.device),
+                ref_s.to(self.device), torch.tensor(speed, dtype=torch.float, device=self.device)
+            )
+        return [self.Output(audio=a.float().cpu(), pred_dur=p.cpu()) for a, p in zip(audios, pred_durs)]
+
 class KModelForONNX(torch.nn.Module):
     def __init__(self, kmodel: KModel):
         super().__init__()
@@ -8,6 +8,11 @@ import torch.nn as nn
 import torch.nn.functional as F
 
 
+def _is_unpadded(lengths, m):
+    # Every sequence fills the time axis, so packing would change nothing
+    return bool((lengths == m.shape[-1]).all())
+
+
 class LinearNorm(nn.Module):
     def __init__(self, in_dim, out_dim, bias=True, w_init_gain="linear"):
         super(LinearNorm, self).__init__()
@@ -66,21 +71,26 @@ class TextEncoder(nn.Module):
             x = c(x)
             x.masked_fill_(m, 0.0)
         x = x.transpose(1, 2)  # [B, T, chn]
-        lengths = (
-            input_lengths
-            if input_lengths.device == torch.device("cpu")
-            else input_lengths.to("cpu")
-        )
-        x = nn.utils.rnn.pack_padded_sequence(
-            x, lengths, batch_first=True, enforce_sorted=False
-        )
-        self.lstm.flatten_parameters()
-        x, _ = self.lstm(x)
-        x, _ = nn.utils.rnn.pad_packed_sequence(x, batch_first=True)
-        x = x.transpose(-1, -2)
-        x_pad = torch.zeros([x.shape[0], x.shape[1], m.shape[-1]], device=x.device)
-        x_pad[:, :, : x.shape[-1]] = x
-        x = x_pad
+        if _is_unpadded(input_lengths, m):
+            x, _ = self.lstm(x)
+            x = x.transpose(-1, -2)
+        else:
+            lengths = (
+                input_lengths
+                if input_lengths.device == torch.device("cpu")
+                else input_lengths.to("cpu")
+            )
+            x = nn.utils.rnn.pack_padded_sequence(
+                x, lengths, batch_first=True, enforce_sorted=False
+            )
+            if hasattr(self.lstm, "flatten_parameters"):  # int8 LSTMs don't have it
+                self.lstm.flatten_parameters()
+            x, _ = self.lstm(x)
+            x, _ = nn.utils.rnn.pad_packed_sequence(x, batch_first=True)
+            x = x.transpose(-1, -2)
+            x_pad = torch.zeros([x.shape[0], x.shape[1], m.shape[-1]], device=x.device)
+            x_pad[:, :, : x.shape[-1]] = x
+            x = x_pad
         x.masked_fill_(m, 0.0)
         return x
 
@@ -143,21 +153,25 @@ class ProsodyPredictor(nn.Module):
     def forward(self, texts, style, text_lengths, alignment, m):
         d = self.text_encoder(texts, style, text_lengths, m)
         m = m.unsqueeze(1)
-        lengths = (
-            text_lengths
-            if text_lengths.device == torch.device("cpu")
-            else text_lengths.to("cpu")
-        )
-        x = nn.utils.rnn.pack_padded_sequence(
-            d, lengths, batch_first=True, enforce_sorted=False
-        )
-        self.lstm.flatten_parameters()
-        x, _ = self.lstm(x)
-        x, _ = nn.utils.rnn.pad_packed_sequence(x, batch_first=True)
-        x_pad = torch.zeros([x.shape[0], m.shape[-1], x.shape[-1]], device=x.device)
-        x_pad[:, : x.shape[1], :] = x
-        x = x_pad
-        duration = self.duration_proj(nn.functional.dropout(x, 0.5, training=False))
+        if _is_unpadded(text_lengths, m):
+            x, _ = self.lstm(d)
+        else:
+            lengths = (
+                text_lengths
+                if text_lengths.device == torch.device("cpu")
+                else text_lengths.to("cpu")
+            )
+            x = nn.utils.rnn.pack_padded_sequence(
+                d, lengths, batch_first=True, enforce_sorted=False
+            )
+            if hasattr(self.lstm, "flatten_parameters"):  # int8 LSTMs don't have it
+                self.lstm.flatten_parameters()
+            x, _ = self.lstm(x)
+            x, _ = nn.utils.rnn.pad_packed_sequence(x, batch_first=True)
+            x_pad = torch.zeros([x.shape[0], m.shape[-1], x.shape[-1]], device=x.device)
+            x_pad[:, : x.shape[1], :] = x
+            x = x_pad
+        duration = self.duration_proj(x)
         en = d.transpose(-1, -2) @ alignment
         return duration.squeeze(-1), en
 
@@ -201,11 +215,15 @@ class DurationEncoder(nn.Module):
         x.masked_fill_(masks.unsqueeze(-1).transpose(0, 1), 0.0)
         x = x.transpose(0, 1)
         x = x.transpose(-1, -2)
+        unpadded = _is_unpadded(text_lengths, m)
         for block in self.lstms:
             if isinstance(block, AdaLayerNorm):
                 x = block(x.transpose(-1, -2), style).transpose(-1, -2)
                 x = torch.cat([x, s.permute(1, 2, 0)], axis=1)
                 x.masked_fill_(masks.unsqueeze(-1).transpose(-1, -2), 0.0)
+            elif unpadded:
+                x, _ = block(x.transpose(-1, -2))
+                x = x.transpose(-1, -2)
             else:
                 lengths = (
                     text_lengths
@@ -216,10 +234,10 @@ class DurationEncoder(nn.Module):
                 x = nn.utils.rnn.pack_padded_sequence(
                     x, lengths, batch_first=True, enforce_sorted=False
                 )
-                block.flatten_parameters()
+                if hasattr(block, "flatten_parameters"):  # int8 LSTMs don't have it
+                    block.flatten_parameters()
                 x, _ = block(x)
                 x, _ = nn.utils.rnn.pad_packed_sequence(x, batch_first=True)
-                x = F.dropout(x, p=self.dropout, training=False)
                 x = x.transpose(-1, -2)
                 x_pad = torch.zeros(
                     [x.shape[0], x.shape[1], m.shape[-1]], device=x.device
@@ -0,0 +1,217 @@
+"""ONNX Runtime backend for Kokoro
+
+Exports KModelForONNX (with disable_complex=True, so the decoder uses
+CustomSTFT instead of complex ops) to an ONNX graph with a dynamic sequence
+length, and runs it on onnxruntime's CPU execution provider behind the same
+interface KPipeline expects from a KModel.
+
+Export once, then check the graph against the torch path:
+python -m narration.kokoro.onnx_backend export
+python -m narration.kokoro.onnx_backend check
+
+Use it with KPipeline(lang_code='a', backend='onnx') or TTS_BACKEND=onnx.
+"""
+
+from .model import KModel, KModelForONNX
+from .weights import resolve_file
+from loguru import logger
+from typing import Dict, List, Optional, Union
+import argparse
+import json
+import os
+import time
+import torch
+
+REPO_ID = 'hexgrad/Kokoro-82M'
+DEFAULT_ONNX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kokoro.onnx')
+OPSET_VERSION = 17
+SAMPLE_PHONEMES = 'ðə skˈaɪ əbˈʌv ðə pˈɔɹt wʌz ðə kˈʌlɚ ʌv tˈɛləvˌɪʒən.'
+
+
+def load_config(repo_id: str = REPO_ID, config: Union[Dict, str, None] = None) -> Dict:
+    if isinstance(config, dict):
+        return config
+    if not config:
+        config = resolve_file(repo_id, 'config.json')
+    with open(config, 'r', encoding='utf-8') as r:
+        return json.load(r)
+
+
+def export_onnx(
+    output_path: str = DEFAULT_ONNX_PATH,
+    repo_id: str = REPO_ID,
+    opset_version: int = OPSET_VERSION
+) -> str:
+    model = KModel(repo_id=repo_id, disable_complex=True).freeze_for_inference()
+    wrapper = KModelForONNX(model).eval()
+    input_ids = [i for i in map(lambda p: model.vocab.get(p), SAMPLE_PHONEMES) if i is not None]
+    input_ids = torch.LongTensor([[0, *input_ids, 0]])
+    ref_s = torch.randn(1, 256)
+    speed = torch.tensor([1.0])
+
+    t = time.time()
+    torch.onnx.export(
+        wrapper,
+        (input_ids, ref_s, speed),
+        output_path,
+        input_names=['input_ids', 'ref_s', 'speed'],
+        output_names=['waveform', 'duration'],
+        dynamic_axes={
+            'input_ids': {1: 'seq'},
+            'waveform': {0: 'samples'},
+            'duration': {0: 'seq'},
+        },
+        opset_version=opset_version,
+        do_constant_folding=True,
+    )
+    logger.info(f"Exported {output_path} in {time.time()-t:.1f}s")
+    return output_path
+
+
+class ONNXModel:
+    '''
+    Drop-in stand-in for KModel that runs an exported graph with onnxruntime
+    on CPU. Only forward/forward_batch are supported; there is no torch
+    module behind it to tweak.
+    '''
+
+    def __init__(
+        self,
+        onnx_path: Optional[str] = None,
+        repo_id: str = REPO_ID,
+        config: Union[Dict, str, None] = None,
+        threads: Optional[int] = None
+    ):
+        import onnxruntime as ort
+
+        onnx_path = onnx_path or DEFAULT_ONNX_PATH
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(
+                f"{onnx_path} not found, run `python -m narration.kokoro.onnx_backend export` first"
+            )
+        config = load_config(repo_id, config)
+        self.repo_id = repo_id
+        self.vocab = config['vocab']
+        self.context_length = config['plbert']['max_position_embeddings']
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or os.cpu_count()
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+
+    @property
+    def device(self):
+        return torch.device('cpu')
+
+    def forward_with_tokens(
+        self,
+        input_ids: torch.LongTensor,
+        ref_s: torch.FloatTensor,
+        speed: float = 1
+    ) -> tuple[torch.FloatTensor, torch.LongTensor]:
+        waveform, duration = self.session.run(None, {
+            'input_ids': input_ids.cpu().numpy(),
+            'ref_s': ref_s.cpu().float().numpy(),
+            'speed': torch.tensor([speed], dtype=torch.float).numpy(),
+        })
+        return torch.from_numpy(waveform), torch.from_numpy(duration)
+
+    def forward(
+        self,
+        phonemes: str,
+        ref_s: torch.FloatTensor,
+        speed: float = 1,
+        return_output: bool = False
+    ) -> Union[KModel.Output, torch.FloatTensor]:
+        input_ids = list(filter(lambda i: i is not None, map(lambda p: self.vocab.get(p), phonemes)))
+        assert len(input_ids)+2 <= self.context_length, (len(input_ids)+2, self.context_length)
+        input_ids = torch.LongTensor([[0, *input_ids, 0]])
+        audio, pred_dur = self.forward_with_tokens(input_ids, ref_s, speed)
+        return KModel.Output(audio=audio, pred_dur=pred_dur) if return_output else audio
+
+    __call__ = forward
+
+    def forward_batch(
+        self,
+        phonemes: List[str],
+        ref_s: torch.FloatTensor,
+        speed: List[float]
+    ) -> List[KModel.Output]:
+        # The graph is exported for batch size 1
+        return [
+            self.forward(ps, ref_s[i:i+1], speed[i], return_output=True)
+            for i, ps in enumerate(phonemes)
+        ]
+
+
+def log_spectrogram(audio: torch.FloatTensor) -> torch.FloatTensor:
+    spec = torch.stft(
+        audio, n_fft=1024, hop_length=256, window=torch.hann_window(1024), return_complex=True
+    )
+    return torch.log10(spec.abs() + 1e-5)
+
+
+def spectral_distance(a: torch.FloatTensor, b: torch.FloatTensor) -> float:
+    """Mean absolute log-magnitude difference between two equal-length signals."""
+    return (log_spectrogram(a) - log_spectrogram(b)).abs().mean().item()
+
+
+def check_parity(
+    onnx_path: str = DEFAULT_ONNX_PATH,
+    voice: str = 'af_heart',
+    phonemes: str = SAMPLE_PHONEMES,
+    repo_id: str = REPO_ID,
+    tolerance: float = 1.5
+) -> bool:
+    '''
+    Compares the ONNX graph with the torch path on the same phonemes.
+
+    pred_dur must match exactly. The vocoder's noise source is random on
+    every call, so audio can't match sample for sample; instead the ONNX
+    output's spectral distance from the torch output must stay within
+    tolerance times the distance between two torch runs.
+    '''
+    torch_model = KModel(repo_id=repo_id).freeze_for_inference()
+    onnx_model = ONNXModel(onnx_path, repo_id=repo_id)
+    pack = torch.load(resolve_file(repo_id, f'voices/{voice}.pt'), weights_only=True)
+    ref_s = pack[len(phonemes)-1]
+
+    t = time.time()
+    reference = torch_model(phonemes, ref_s, return_output=True)
+    torch_time = time.time() - t
+    rerun = torch_model(phonemes, ref_s, return_output=True)
+    t = time.time()
+    candidate = onnx_model(phonemes, ref_s, return_output=True)
+    onnx_time = time.time() - t
+
+    same_durations = torch.equal(reference.pred_dur, candidate.pred_dur)
+    same_length = reference.audio.shape == candidate.audio.shape
+    noise_floor = spectral_distance(reference.audio, rerun.audio)
+    distance = spectral_distance(reference.audio, candidate.audio) if same_length else float('inf')
+    passed = same_durations and same_length and distance <= tolerance * noise_floor + 1e-3
+
+    print(f"torch: {torch_time:.2f}s, onnx: {onnx_time:.2f}s")
+    print(f"pred_dur equal: {same_durations}")
+    print(f"audio length equal: {same_length}")
+    print(f"spectral distance: {distance:.4f} (torch vs torch: {noise_floor:.4f})")
+    return passed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Export and check the Kokoro ONNX graph')
+    parser.add_argument('command', choices=['export', 'check'])
+    parser.add_argument('-o', '--onnx-path', default=DEFAULT_ONNX_PATH)
+    parser.add_argument('--repo-id', default=REPO_ID)
+    parser.add_argument('--voice', default='af_heart')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_onnx(args.onnx_path, repo_id=args.repo_id)
+    else:
+        passed = check_parity(args.onnx_path, voice=args.voice, repo_id=args.repo_id)
+        print('PASSED' if passed else 'FAILED')
+
+
+if __name__ == '__main__':
+    main()
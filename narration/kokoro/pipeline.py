@@ -1,10 +1,15 @@
 from .model import KModel
+from .onnx_backend import ONNXModel
+from .weights import resolve_file
 from dataclasses import dataclass
-from huggingface_hub import hf_hub_download
 from loguru import logger
 from misaki import en, espeak
-from typing import Callable, Generator, List, Optional, Tuple, Union
+from typing import Callable, Generator, Iterable, List, Optional, Tuple, Union
+from collections import OrderedDict
+import copy
+import queue
 import re
+import threading
 import torch
 import os
 
@@ -39,6 +44,56 @@ LANG_CODES = dict(
     z='Mandarin Chinese',
 )
 
+# Chunk break candidates for en_tokenize, in order of preference, and closing
+# marks a break moves past
+WATERFALL = ['!.?…', ':;', ',—']
+BUMPS = [')', '”']
+
+# G2P results kept per pipeline, keyed by the exact segment passed to G2P
+G2P_CACHE_SIZE = 1024
+# Chunks G2P may run ahead of inference
+G2P_QUEUE_SIZE = 8
+
+def run_ahead(iterable: Iterable, maxsize: int = G2P_QUEUE_SIZE) -> Generator:
+    '''
+    Yields the items of iterable, produced on a background thread up to
+    maxsize items ahead of the consumer. Exceptions are re-raised in the
+    consumer; closing the generator stops the producer.
+    '''
+    items = queue.Queue(maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
 class KPipeline:
     '''
     KPipeline is a language-aware support class with 2 main responsibilities:
@@ -68,7 +123,10 @@ class KPipeline:
         model: Union[KModel, bool] = True,
         trf: bool = False,
         en_callable: Optional[Callable[[str], str]] = None,
-        device: Optional[str] = None
+        device: Optional[str] = None,
+        backend: str = 'torch',
+        onnx_path: Optional[str] = None,
+        precision: str = 'fp32'
     ):
         """Initialize a KPipeline.
         
@@ -79,6 +137,11 @@ class KPipeline:
             device: Override default device selection ('cuda' or 'cpu', or None for auto)
                    If None, will auto-select cuda if available
                    If 'cuda' and not available, will explicitly raise an error
+            backend: 'torch' for a KModel, or 'onnx' to run an exported graph
+                   with onnxruntime on CPU (see onnx_backend.py)
+            onnx_path: ONNX graph to load when backend='onnx'
+            precision: 'fp32', 'int8' or 'bf16' for the KModel this pipeline
+                   creates (see KModel.__init__)
         """
         if repo_id is None:
             repo_id = 'hexgrad/Kokoro-82M'
@@ -89,8 +152,10 @@ class KPipeline:
         assert lang_code in LANG_CODES, (lang_code, LANG_CODES)
         self.lang_code = lang_code
         self.model = None
-        if isinstance(model, KModel):
+        if isinstance(model, (KModel, ONNXModel)):
             self.model = model
+        elif model and backend == 'onnx':
+            self.model = ONNXModel(onnx_path, repo_id=repo_id)
         elif model:
             if device == 'cuda' and not torch.cuda.is_available():
                 raise RuntimeError("CUDA requested but not available")
@@ -106,13 +171,15 @@ class KPipeline:
                 else:
                     device = 'cpu'
             try:
-                self.model = KModel(repo_id=repo_id).to(device).eval()
+                self.model = KModel(repo_id=repo_id, precision=precision).to(device).eval().freeze_for_inference()
             except RuntimeError as e:
                 if device == 'cuda':
                     raise RuntimeError(f"""Failed to initialize model on CUDA: {e}. 
                                        Try setting device='cpu' or check CUDA installation.""")
                 raise
         self.voices = {}
+        self.g2p_cache = OrderedDict()
+        self._g2p_lock = threading.Lock()
         if lang_code in 'ab':
             try:
                 fallback = espeak.EspeakFallback(british=lang_code=='b')
@@ -149,7 +216,7 @@ class KPipeline:
         if voice.endswith('.pt'):
             f = voice
         else:
-            f = hf_hub_download(repo_id=self.repo_id, filename=f'voices/{voice}.pt')
+            f = resolve_file(self.repo_id, f'voices/{voice}.pt')
             if not voice.startswith(self.lang_code):
                 v = LANG_CODES.get(voice, voice)
                 p = LANG_CODES.get(self.lang_code, self.lang_code)
@@ -176,6 +243,24 @@ class KPipeline:
         self.voices[voice] = torch.mean(torch.stack(packs), dim=0)
         return self.voices[voice]
 
+    def cached_g2p(self, graphemes: str):
+        '''
+        self.g2p with an LRU memo keyed by the segment exactly as given, so
+        a hit returns what self.g2p(graphemes) would. (Splitting segments
+        further would change the phonemes, since G2P sees less context.)
+        Returns deep copies, since en_tokenize and join_timestamps mutate
+        the tokens.
+        '''
+        key = graphemes
+        with self._g2p_lock:
+            if key in self.g2p_cache:
+                self.g2p_cache.move_to_end(key)
+            else:
+                self.g2p_cache[key] = self.g2p(graphemes)
+                if len(self.g2p_cache) > G2P_CACHE_SIZE:
+                    self.g2p_cache.popitem(last=False)
+            return copy.deepcopy(self.g2p_cache[key])
+
     @staticmethod
     def tokens_to_ps(tokens: List[en.MToken]) -> str:
         return ''.join(t.phonemes + (' ' if t.whitespace else '') for t in tokens).strip()
@@ -184,8 +269,8 @@ class KPipeline:
     def waterfall_last(
         tokens: List[en.MToken],
         next_count: int,
-        waterfall: List[str] = ['!.?…', ':;', ',—'],
-        bumps: List[str] = [')', '”']
+        waterfall: List[str] = WATERFALL,
+        bumps: List[str] = BUMPS
     ) -> int:
         for w in waterfall:
             z = next((i for i, t in reversed(list(enumerate(tokens))) if t.phonemes in set(w)), None)
@@ -206,29 +291,70 @@ class KPipeline:
         self,
         tokens: List[en.MToken]
     ) -> Generator[Tuple[str, str, List[en.MToken]], None, None]:
-        tks = []
+        '''
+        Splits tokens into chunks of at most 510 phonemes, breaking after the
+        last sentence, clause or comma punctuation that fits (waterfall_last).
+        Runs in one pass: phoneme lengths are kept as running offsets and the
+        last break candidate per waterfall level is tracked as tokens arrive,
+        so chunks are measured without re-joining their phonemes.
+        '''
+        levels = {p: level for level, w in enumerate(WATERFALL) for p in w}
+        last_break = [-1] * len(WATERFALL)
+        tks = []  # every token so far; the current chunk is tks[start:]
+        offsets = [0]  # offsets[i] == len(''.join(pieces of tks[:i]))
+        start = 0
         pcount = 0
+
+        def piece(i: int) -> str:
+            return tks[i].phonemes + (' ' if tks[i].whitespace else '')
+
+        def ps_len(a: int, b: int) -> int:
+            # len(tokens_to_ps(tks[a:b])), stripping only the pieces at either end
+            while a < b and not piece(a).strip():
+                a += 1
+            while b > a and not piece(b-1).strip():
+                b -= 1
+            if a == b:
+                return 0
+            first, last = piece(a), piece(b-1)
+            return (offsets[b] - offsets[a]
+                    - (len(first) - len(first.lstrip())) - (len(last) - len(last.rstrip())))
+
         for t in tokens:
             # American English: ɾ => T
             t.phonemes = '' if t.phonemes is None else t.phonemes#.replace('ɾ', 'T')
             next_ps = t.phonemes + (' ' if t.whitespace else '')
+            piece_len = len(next_ps)
             next_pcount = pcount + len(next_ps.rstrip())
             if next_pcount > 510:
-                z = KPipeline.waterfall_last(tks, next_pcount)
-                text = KPipeline.tokens_to_text(tks[:z])
-                logger.debug(f"Chunking text at {z}: '{text[:30]}{'...' if len(text) > 30 else ''}'")
-                ps = KPipeline.tokens_to_ps(tks[:z])
-                yield text, ps, tks[:z]
-                tks = tks[z:]
-                pcount = len(KPipeline.tokens_to_ps(tks))
-                if not tks:
+                end = len(tks)
+                z = end
+                for i in last_break:
+                    if i < start:
+                        continue
+                    cut = i + 1
+                    if cut < end and tks[cut].phonemes in BUMPS:
+                        cut += 1
+                    if next_pcount - ps_len(start, cut) <= 510:
+                        z = cut
+                        break
+                chunk = tks[start:z]
+                text = KPipeline.tokens_to_text(chunk)
+                logger.debug(f"Chunking text at {z-start}: '{text[:30]}{'...' if len(text) > 30 else ''}'")
+                yield text, KPipeline.tokens_to_ps(chunk), chunk
+                start = z
+                pcount = ps_len(start, end)
+                if start == end:
                     next_ps = next_ps.lstrip()
+            level = levels.get(t.phonemes)
+            if level is not None:
+                last_break[level] = len(tks)
             tks.append(t)
+            offsets.append(offsets[-1] + piece_len)
             pcount += len(next_ps)
-        if tks:
-            text = KPipeline.tokens_to_text(tks)
-            ps = KPipeline.tokens_to_ps(tks)
-            yield ''.join(text).strip(), ''.join(ps).strip(), tks
+        if start < len(tks):
+            chunk = tks[start:]
+            yield KPipeline.tokens_to_text(chunk), KPipeline.tokens_to_ps(chunk), chunk
 
     @staticmethod
     def infer(
@@ -241,6 +367,17 @@ class KPipeline:
             speed = speed(len(ps))
         return model(ps, pack[len(ps)-1], speed, return_output=True)
 
+    @staticmethod
+    def infer_batch(
+        model: KModel,
+        ps_list: List[str],
+        pack: torch.FloatTensor,
+        speed: Union[float, Callable[[int], float]] = 1
+    ) -> List[KModel.Output]:
+        speeds = [speed(len(ps)) if callable(speed) else speed for ps in ps_list]
+        ref_s = torch.cat([pack[len(ps)-1] for ps in ps_list])
+        return model.forward_batch(ps_list, ref_s, speeds)
+
     def generate_from_tokens(
         self,
         tokens: Union[str, List[en.MToken]],
@@ -336,6 +473,8 @@ class KPipeline:
         tokens: Optional[List[en.MToken]] = None
         output: Optional[KModel.Output] = None
         text_index: Optional[int] = None
+        # set by plan(), consumed by vocode()
+        prediction: Optional[KModel.DurationPrediction] = None
 
         @property
         def audio(self) -> Optional[torch.FloatTensor]:
@@ -358,85 +497,168 @@ class KPipeline:
             return 3
         #### MARK: END BACKWARD COMPAT ####
 
-    def __call__(
+    def iter_chunks(
         self,
         text: Union[str, List[str]],
-        voice: Optional[str] = None,
-        speed: Union[float, Callable[[int], float]] = 1,
-        split_pattern: Optional[str] = r'\n+',
-        model: Optional[KModel] = None
-    ) -> Generator['KPipeline.Result', None, None]:
-        model = model or self.model
-        if model and voice is None:
-            raise ValueError('Specify a voice: en_us_pipeline(text="Hello world!", voice="af_heart")')
-        pack = self.load_voice(voice).to(model.device) if model else None
-        
+        split_pattern: Optional[str] = r'\n+'
+    ) -> Generator[Tuple[str, str, Optional[List[en.MToken]], int], None, None]:
+        """Yields (graphemes, phonemes, tokens, text_index) for every chunk the model will see."""
         # Convert input to list of segments
         if isinstance(text, str):
             text = re.split(split_pattern, text.strip()) if split_pattern else [text]
-            
+
         # Process each segment
         for graphemes_index, graphemes in enumerate(text):
             if not graphemes.strip():  # Skip empty segments
                 continue
-                
+
             # English processing (unchanged)
             if self.lang_code in 'ab':
                 logger.debug(f"Processing English text: {graphemes[:50]}{'...' if len(graphemes) > 50 else ''}")
-                _, tokens = self.g2p(graphemes)
+                _, tokens = self.cached_g2p(graphemes)
                 for gs, ps, tks in self.en_tokenize(tokens):
                     if not ps:
                         continue
                     elif len(ps) > 510:
                         logger.warning(f"Unexpected len(ps) == {len(ps)} > 510 and ps == '{ps}'")
                         ps = ps[:510]
-                    output = KPipeline.infer(model, ps, pack, speed) if model else None
-                    if output is not None and output.pred_dur is not None:
-                        KPipeline.join_timestamps(tks, output.pred_dur)
-                    yield self.Result(graphemes=gs, phonemes=ps, tokens=tks, output=output, text_index=graphemes_index)
-            
+                    yield gs, ps, tks, graphemes_index
+
             # Non-English processing with chunking
             else:
                 # Split long text into smaller chunks (roughly 400 characters each)
                 # Using sentence boundaries when possible
                 chunk_size = 400
                 chunks = []
-                
+
                 # Try to split on sentence boundaries first
                 sentences = re.split(r'([.!?]+)', graphemes)
                 current_chunk = ""
-                
+
                 for i in range(0, len(sentences), 2):
                     sentence = sentences[i]
                     # Add the punctuation back if it exists
                     if i + 1 < len(sentences):
                         sentence += sentences[i + 1]
-                        
+
                     if len(current_chunk) + len(sentence) <= chunk_size:
                         current_chunk += sentence
                     else:
                         if current_chunk:
                             chunks.append(current_chunk.strip())
                         current_chunk = sentence
-                
+
                 if current_chunk:
                     chunks.append(current_chunk.strip())
-                
+
                 # If no chunks were created (no sentence boundaries), fall back to character-based chunking
                 if not chunks:
                     chunks = [graphemes[i:i+chunk_size] for i in range(0, len(graphemes), chunk_size)]
-                
+
                 # Process each chunk
                 for chunk in chunks:
                     if not chunk.strip():
                         continue
-                        
-                    ps, _ = self.g2p(chunk)
+
+                    ps, _ = self.cached_g2p(chunk)
                     if not ps:
                         continue
                     elif len(ps) > 510:
                         logger.warning(f'Truncating len(ps) == {len(ps)} > 510')
                         ps = ps[:510]
-                        
-                    output = KPipeline.infer(model, ps, pack, speed) if model else None
-                    yield self.Result(graphemes=chunk, phonemes=ps, output=output, text_index=graphemes_index)
+
+                    yield chunk, ps, None, graphemes_index
+
+    def infer_chunks(
+        self,
+        model: Optional[KModel],
+        chunks: List[Tuple[str, str, Optional[List[en.MToken]], int]],
+        pack: Optional[torch.FloatTensor],
+        speed: Union[float, Callable[[int], float]] = 1
+    ) -> Generator['KPipeline.Result', None, None]:
+        if not model:
+            outputs = [None] * len(chunks)
+        elif len(chunks) == 1:
+            outputs = [KPipeline.infer(model, chunks[0][1], pack, speed)]
+        else:
+            outputs = KPipeline.infer_batch(model, [ps for _, ps, _, _ in chunks], pack, speed)
+        for (gs, ps, tks, text_index), output in zip(chunks, outputs):
+            if tks is not None and output is not None and output.pred_dur is not None:
+                KPipeline.join_timestamps(tks, output.pred_dur)
+            yield self.Result(graphemes=gs, phonemes=ps, tokens=tks, output=output, text_index=text_index)
+
+    def plan(
+        self,
+        text: Union[str, List[str]],
+        voice: str,
+        speed: Union[float, Callable[[int], float]] = 1,
+        split_pattern: Optional[str] = r'\n+',
+        model: Optional[KModel] = None
+    ) -> Generator['KPipeline.Result', None, None]:
+        """
+        Phase one of synthesis: G2P and duration prediction only. Results
+        carry pred_dur and token timestamps but no audio until vocode().
+        """
+        model = model or self.model
+        if not model or voice is None:
+            raise ValueError('plan() needs a model and a voice')
+        pack = self.load_voice(voice).to(model.device)
+        for gs, ps, tks, text_index in run_ahead(self.iter_chunks(text, split_pattern)):
+            chunk_speed = speed(len(ps)) if callable(speed) else speed
+            prediction = model.predict(ps, pack[len(ps)-1], chunk_speed)
+            pred_dur = prediction.pred_dur.cpu()
+            if tks is not None:
+                KPipeline.join_timestamps(tks, pred_dur)
+            yield self.Result(
+                graphemes=gs, phonemes=ps, tokens=tks,
+                output=KModel.Output(audio=None, pred_dur=pred_dur),
+                text_index=text_index, prediction=prediction
+            )
+
+    @staticmethod
+    def retime(result: 'KPipeline.Result', speed: float) -> 'KPipeline.Result':
+        """
+        Re-rounds a plan() result's durations for another speed and updates
+        its token timestamps, without re-running the model.
+        """
+        result.prediction = result.prediction.at_speed(speed)
+        result.output.pred_dur = result.prediction.pred_dur.cpu()
+        if result.tokens is not None:
+            KPipeline.join_timestamps(result.tokens, result.output.pred_dur)
+        return result
+
+    def vocode(self, result: 'KPipeline.Result', model: Optional[KModel] = None) -> 'KPipeline.Result':
+        """Phase two: runs the decoder for a result from plan() and fills in its audio."""
+        model = model or self.model
+        result.output.audio = model.vocode(result.prediction)
+        result.prediction = None
+        return result
+
+    def __call__(
+        self,
+        text: Union[str, List[str]],
+        voice: Optional[str] = None,
+        speed: Union[float, Callable[[int], float]] = 1,
+        split_pattern: Optional[str] = r'\n+',
+        model: Optional[KModel] = None,
+        batch_size: int = 1
+    ) -> Generator['KPipeline.Result', None, None]:
+        """
+        With batch_size > 1, up to that many chunks (across segments) go
+        through the model together, and their results are yielded in order
+        once the batch finishes.
+        """
+        model = model or self.model
+        if model and voice is None:
+            raise ValueError('Specify a voice: en_us_pipeline(text="Hello world!", voice="af_heart")')
+        pack = self.load_voice(voice).to(model.device) if model else None
+
+        # G2P for the next chunks runs on its own thread while the model works
+        batch = []
+        for chunk in run_ahead(self.iter_chunks(text, split_pattern)):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                yield from self.infer_chunks(model, batch, pack, speed)
+                batch = []
+        if batch:
+            yield from self.infer_chunks(model, batch, pack, speed)
@@ -0,0 +1,89 @@
+"""Model file resolution and weight loading for Kokoro
+
+hf_hub_download revalidates against the Hub on every call and fails slowly
+when offline, so resolve_file tries the local HF cache first and only goes
+to the network for files that aren't there yet.
+
+The .pth checkpoints are pickles that torch.load reads into fresh memory.
+convert_to_safetensors writes a checkpoint once as safetensors into a
+directory the caller owns (reused until the checkpoint changes; the HF
+cache itself may be read-only or shared, so nothing is written there),
+and load_state_dicts loads that instead. safetensors memory-maps the
+file, so loading is mostly page faults, and processes that load the same
+model share its read-only pages through the page cache.
+"""
+
+from huggingface_hub import hf_hub_download
+from huggingface_hub.utils import LocalEntryNotFoundError
+from loguru import logger
+from typing import Dict, Optional
+import hashlib
+import os
+import torch
+
+try:
+    from safetensors.torch import load_file, save_file
+except ImportError:
+    load_file = save_file = None
+
+
+def resolve_file(repo_id: str, filename: str) -> str:
+    '''Local path of a Hub file, from the HF cache when present and downloaded otherwise.'''
+    try:
+        return hf_hub_download(repo_id=repo_id, filename=filename, local_files_only=True)
+    except LocalEntryNotFoundError:
+        logger.debug(f"{repo_id}/{filename} not cached, downloading")
+        return hf_hub_download(repo_id=repo_id, filename=filename)
+
+
+def safetensors_path(path: str, cache_dir: str) -> str:
+    '''Where the safetensors conversion of the checkpoint at path lives in cache_dir.'''
+    # HF snapshot files are symlinks to content-addressed blobs, so the
+    # resolved path tells revisions of the same filename apart
+    digest = hashlib.sha1(os.path.realpath(path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f'{os.path.splitext(os.path.basename(path))[0]}-{digest}.safetensors')
+
+
+def convert_to_safetensors(path: str, cache_dir: str) -> Optional[str]:
+    '''
+    Writes the checkpoint at path ({module: state_dict}) as a flat
+    safetensors file in cache_dir, unless an up-to-date one exists. Returns
+    its path, or None if safetensors isn't installed or cache_dir isn't
+    writable.
+    '''
+    if save_file is None:
+        return None
+    converted = safetensors_path(path, cache_dir)
+    if os.path.exists(converted) and os.path.getmtime(converted) >= os.path.getmtime(os.path.realpath(path)):
+        return converted
+    tensors = {
+        f'{key}.{name}': tensor.contiguous()
+        for key, state_dict in torch.load(path, map_location='cpu', weights_only=True).items()
+        for name, tensor in state_dict.items()
+    }
+    tmp_path = f'{converted}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        save_file(tensors, tmp_path, metadata={'source': os.path.basename(path)})
+        os.replace(tmp_path, converted)
+    except OSError as e:
+        logger.warning(f"Could not write {converted}, loading the checkpoint directly: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    logger.info(f"Converted {os.path.basename(path)} to {converted}")
+    return converted
+
+
+def load_state_dicts(path: str) -> Dict[str, Dict[str, torch.Tensor]]:
+    '''
+    Loads a checkpoint as {module: state_dict}: memory-mapped for a
+    safetensors file (see convert_to_safetensors), with torch.load otherwise.
+    '''
+    if not path.endswith('.safetensors'):
+        return torch.load(path, map_location='cpu', weights_only=True)
+    state_dicts = {}
+    for name, tensor in load_file(path, device='cpu').items():
+        key, name = name.split('.', 1)
+        state_dicts.setdefault(key, {})[name] = tensor
+    return state_dicts
@@ -1,9 +1,24 @@
+from src.narration.tts_engine import get_engine, daemon_available, request_narration
+from src.narration.parallel_narration import get_parallel_narrator
+from src.narration.narration_cache import (
+    narration_cache_key,
+    load_cached_narration,
+    store_cached_narration,
+    remove_emojis_from_text,
+)
+from src.narration.pause_compaction import (
+    MAX_PAUSE_SECONDS,
+    MIN_PAUSE_SECONDS,
+    compact_pauses,
+    compact_word_timings,
+    estimate_removed_seconds,
+    shift_times,
+)
 from narration.kokoro.pipeline import KPipeline
+import numpy as np
 import soundfile as sf
-import time
 import os
 import wave
-import re
 
 
 from loguru import logger
@@ -20,9 +35,8 @@ def test_voices():
     print(voices)
 
     for voice in voices:
-        pipeline = KPipeline(lang_code="a", repo_id="hexgrad/Kokoro-82M")
         text = "Kokoro is running from source on Windows 123!"
-        generator = pipeline(text, voice=voice)
+        generator = get_engine().synthesize(voice, text)
 
         for i, (gs, ps, audio) in enumerate(generator):
             print(f"{i}: {gs} -> {ps}")
@@ -37,71 +51,387 @@ def list_voices():
         print("  -", voice)
 
 
-def concatenate_wav_files(input_files, output_file):
-    with wave.open(output_file, "wb") as output_wav:
-        params_set = False  # Track if we've set the output parameters
+def get_wav_duration(file_path):
+    with wave.open(file_path, "rb") as wav_file:
+        frames = wav_file.getnframes()
+        rate = wav_file.getframerate()
+    return frames / float(rate)
 
-        for input_file in input_files:
-            with wave.open(input_file, "rb") as input_wav:
-                if not params_set:
-                    output_wav.setparams(input_wav.getparams())
-                    params_set = True  # Ensure this only happens once
 
-                output_wav.writeframes(input_wav.readframes(input_wav.getnframes()))
+# Rough speaking rate of the default voice at speed 1, used to plan work
+# (like prefetching a sludge window) before the narration exists
+NARRATION_CHARS_PER_SECOND = 15
 
 
-def clear_narrations(file_paths):
-    for f in file_paths:
-        try:
-            os.remove(f)
-        except Exception as e:
-            pass
+def estimate_narration_duration(text):
+    return len(text) / NARRATION_CHARS_PER_SECOND
 
 
-def get_wav_duration(file_path):
-    with wave.open(file_path, "rb") as wav_file:
-        frames = wav_file.getnframes()
-        rate = wav_file.getframerate()
-        duration = frames / float(rate)
-    return int(duration) + 1
-
-
-def remove_emojis_from_text(text):
-    emoji_pattern = re.compile(
-        "["
-        "\U0001f600-\U0001f64f"  # emoticons
-        "\U0001f300-\U0001f5ff"  # symbols & pictographs
-        "\U0001f680-\U0001f6ff"  # transport & map symbols
-        "\U0001f700-\U0001f77f"  # alchemical symbols
-        "\U0001f1e0-\U0001f1ff"  # flags (iOS)
-        "]+",
-        flags=re.UNICODE,
+SAMPLE_RATE = 24000
+
+
+class Narration:
+    """Narrated audio assembled in memory from the pipeline's chunks."""
+
+    def __init__(self, audio, chunk_offsets, word_timings=None, sample_rate=SAMPLE_RATE):
+        self.audio = audio  # float32 samples
+        self.chunk_offsets = chunk_offsets  # seconds at which each chunk starts
+        self.word_timings = word_timings or []  # [{word, start, end}] in seconds
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self):
+        return len(self.audio) / self.sample_rate
+
+    def save(self, output_path):
+        sf.write(output_path, self.audio, self.sample_rate)
+
+    def compact_pauses(self, max_pause=MAX_PAUSE_SECONDS):
+        """A copy with every pause capped at max_pause seconds, timings shifted to match."""
+        audio, cuts = compact_pauses(self.audio, self.sample_rate, max_pause)
+        return Narration(
+            audio,
+            [float(t) for t in shift_times(self.chunk_offsets, cuts, self.sample_rate)],
+            compact_word_timings(self.word_timings, cuts, self.sample_rate),
+            self.sample_rate,
+        )
+
+
+def collect_word_timings(results, chunk_offsets):
+    """[{word, start, end}] in seconds from the start of the narration."""
+    timings = []
+    for result, offset in zip(results, chunk_offsets):
+        for token in result.tokens or []:
+            if token.start_ts is None or token.end_ts is None:
+                continue
+            timings.append({
+                "word": token.text,
+                "start": offset + token.start_ts,
+                "end": offset + token.end_ts,
+            })
+    return timings
+
+
+def assemble_narration(results):
+    """Concatenates the audio of KPipeline.Results into one Narration."""
+    results = [r for r in results if r.audio is not None]
+    chunks = []
+    chunk_offsets = []
+    sample_count = 0
+    for result in results:
+        audio = np.asarray(result.audio, dtype=np.float32)
+        chunk_offsets.append(sample_count / SAMPLE_RATE)
+        chunks.append(audio)
+        sample_count += len(audio)
+
+    audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    return Narration(audio, chunk_offsets, collect_word_timings(results, chunk_offsets))
+
+
+def load_narration_from_cache(key):
+    cached = load_cached_narration(key)
+    if cached is None:
+        return None
+    return Narration(
+        cached["audio"], cached["chunk_offsets"], cached["word_timings"], cached["sample_rate"]
     )
-    return emoji_pattern.sub(r"", text)
 
 
-def narrate(voice, text):
+def save_narration_to_cache(key, narration):
+    try:
+        store_cached_narration(
+            key, narration.audio, narration.sample_rate,
+            narration.chunk_offsets, narration.word_timings,
+        )
+    except OSError as e:
+        print(f"[!] Could not cache narration: {e}")
+
+
+def synthesize(voice, text, max_duration=None, max_pause=None):
+    """Narrates text with the warm engine (or the cache), without touching temp/."""
+    if max_duration or max_pause is not None:
+        return plan_narration(voice, text, max_duration, use_daemon=False, max_pause=max_pause).vocode()
+
+    key = narration_cache_key(text, voice)
+    narration = load_narration_from_cache(key)
+    if narration is not None:
+        return narration
+
+    narrator = get_parallel_narrator()
+    results = narrator.synthesize(voice, text) if narrator else get_engine().synthesize(voice, text)
+    narration = assemble_narration(results)
+    save_narration_to_cache(key, narration)
+    return narration
+
+
+# The decoder turns every predicted duration frame into exactly this many samples
+SAMPLES_PER_FRAME = 600
+
+
+class NarrationPlan:
+    """
+    Phase one of a narration: its exact length and word timings, known
+    from the duration predictor before any audio is vocoded. Plans for
+    cached or daemon-narrated text already hold the finished Narration.
+    With max_pause, vocoding also caps the narration's pauses at that many
+    seconds; until then planned_duration estimates the compacted length.
+    """
+
+    def __init__(self, results=None, narration=None, cache_key=None, max_pause=None):
+        self.results = [r for r in results or [] if r.pred_dur is not None]
+        self.narration = narration
+        self.cache_key = cache_key
+        self.max_pause = max_pause
+        self.compacted = False
+
+    @property
+    def chunk_sample_counts(self):
+        return [
+            len(r.audio) if r.audio is not None else int(r.pred_dur.sum()) * SAMPLES_PER_FRAME
+            for r in self.results
+        ]
+
+    @property
+    def chunk_offsets(self):
+        if self.narration is not None:
+            return self.narration.chunk_offsets
+        offsets, total = [], 0
+        for count in self.chunk_sample_counts:
+            offsets.append(total / SAMPLE_RATE)
+            total += count
+        return offsets
+
+    @property
+    def duration(self):
+        if self.narration is not None:
+            return self.narration.duration
+        return sum(self.chunk_sample_counts) / SAMPLE_RATE
+
+    @property
+    def planned_duration(self):
+        """The length to build the video around: duration, or its expected compacted length."""
+        if self.max_pause is None or self.compacted:
+            return self.duration
+        return self.expected_duration(self.max_pause)
+
+    def word_timings(self):
+        """[{word, start, end}] in seconds from the start of the narration."""
+        if self.narration is not None:
+            return self.narration.word_timings
+        return collect_word_timings(self.results, self.chunk_offsets)
+
+    def expected_duration(self, max_pause=None):
+        """duration, less the silence compact_pauses(max_pause) is expected to remove."""
+        if max_pause is None:
+            return self.duration
+        return self.duration - estimate_removed_seconds(self.word_timings(), self.duration, max_pause)
+
+    def decode(self):
+        """Runs the decoder (once) and returns the uncompacted Narration, which is what gets cached."""
+        if self.narration is None:
+            vocoder = get_parallel_narrator() or get_engine()
+            self.narration = assemble_narration(vocoder.vocode(self.results))
+            if self.cache_key:
+                save_narration_to_cache(self.cache_key, self.narration)
+        return self.narration
+
+    def vocode(self):
+        """Phase two: runs the decoder, compacts pauses if the plan has a max_pause, and returns the Narration."""
+        if self.max_pause is not None and not self.compacted:
+            return self.compact_pauses(self.max_pause)
+        return self.decode()
+
+    def compact_pauses(self, max_pause=MAX_PAUSE_SECONDS):
+        """
+        Vocodes and caps pauses at max_pause, so duration and word timings
+        are the compacted ones. The video was built around the estimate in
+        expected_duration, and a longer narration would lose its end to it,
+        so pauses are capped tighter (down to MIN_PAUSE_SECONDS) until the
+        audio fits the estimate.
+        """
+        if self.compacted:
+            return self.narration
+        planned = self.expected_duration(max_pause)
+        narration = self.decode()
+        pause = max_pause
+        self.narration = narration.compact_pauses(pause)
+        while self.narration.duration > planned and pause > MIN_PAUSE_SECONDS:
+            pause = max(pause * 0.75, MIN_PAUSE_SECONDS)
+            self.narration = narration.compact_pauses(pause)
+        self.max_pause = max_pause
+        self.compacted = True
+        removed = narration.duration - self.narration.duration
+        print(f"[3] Compacted pauses to {pause:.2f}s: {narration.duration:.2f}s -> {self.narration.duration:.2f}s (-{removed:.2f}s)")
+        if self.narration.duration > planned:
+            print(f"[!] Compacted narration is {self.narration.duration:.2f}s, planned for {planned:.2f}s")
+        return self.narration
+
+
+# Fastest speech narrate() will use to fit a max_duration
+MAX_NARRATION_SPEED = 1.4
+# Speed refinements when duration rounding leaves a plan just over budget
+FIT_ATTEMPTS = 4
+
+
+def fit_speed(duration, max_duration, max_speed=MAX_NARRATION_SPEED):
+    """Speed that brings a speed-1 duration down to max_duration, never slower than 1."""
+    if not max_duration or duration <= max_duration:
+        return 1
+    return min(duration / max_duration, max_speed)
+
+
+def retime_results(results, duration, max_duration, max_pause=None):
+    """
+    Re-rounds speed-1 plan results to the speed that fits max_duration
+    (after compacting pauses to max_pause, if given). Per-token rounding
+    and pauses that don't shrink in proportion can overshoot, so the speed
+    is nudged up until it fits or hits MAX_NARRATION_SPEED. Returns the
+    speed used.
+    """
+    speed = fit_speed(duration, max_duration)
+    for _ in range(FIT_ATTEMPTS):
+        for result in results:
+            KPipeline.retime(result, speed)
+        duration = NarrationPlan(results).expected_duration(max_pause)
+        if duration <= max_duration or speed >= MAX_NARRATION_SPEED:
+            break
+        speed = min(speed * duration / max_duration, MAX_NARRATION_SPEED)
+    return speed
+
+
+def fit_narration_plan(plan, voice, text, max_duration, max_pause=None):
+    """
+    Speeds a speed-1 plan up to fit max_duration using its predicted
+    durations, so the audio is only ever vocoded once. With max_pause the
+    silence compaction will remove counts towards the budget, so speech is
+    only sped up by what the pauses can't make up.
+    """
+    duration = plan.expected_duration(max_pause)
+    if duration <= max_duration:
+        return plan
+    if all(r.prediction is not None for r in plan.results):
+        speed = retime_results(plan.results, duration, max_duration, max_pause)
+        key = narration_cache_key(text, voice, speed)
+        narration = load_narration_from_cache(key)
+        plan = NarrationPlan(narration=narration) if narration else NarrationPlan(plan.results, cache_key=key)
+    else:
+        # backends without a separate duration pass have already rendered at speed 1
+        speed = fit_speed(duration, max_duration)
+        key = narration_cache_key(text, voice, speed)
+        narration = load_narration_from_cache(key)
+        if narration is None:
+            narration = assemble_narration(get_engine().synthesize(voice, text, speed=speed))
+            save_narration_to_cache(key, narration)
+        plan = NarrationPlan(narration=narration)
+    if plan.expected_duration(max_pause) > max_duration:
+        print(f"[!] Narration is {plan.expected_duration(max_pause):.1f}s even at {speed:.2f}x speed (budget {max_duration}s)")
+    else:
+        print(f"[3] Narration sped up {speed:.2f}x to fit {max_duration}s")
+    return plan
+
+
+def plan_narration(voice, text, max_duration=None, use_daemon=True, max_pause=None):
+    """
+    Plans text at speed 1, or at the speed that fits max_duration seconds.
+    When the TTS daemon is up it narrates instead of a model loaded here,
+    and the plan comes back already vocoded.
+    With max_pause, pauses are capped at that many seconds when the plan
+    is vocoded, and the speed is chosen for the expected compacted length
+    (planned_duration).
+    """
     text = remove_emojis_from_text(text)
+    key = narration_cache_key(text, voice)
+    narration = load_narration_from_cache(key)
+    if narration is not None:
+        plan = NarrationPlan(narration=narration, max_pause=max_pause)
+        if not max_duration or plan.planned_duration <= max_duration:
+            print(f"[3] Narration cache hit")
+            return plan
 
+    if use_daemon and daemon_available():
+        narration = request_daemon_narration(voice, text, max_duration, max_pause)
+        if narration is not None:
+            return NarrationPlan(narration=narration)
+
+    # with TTS_WORKERS the workers vocode; durations are predicted here
+    plan = NarrationPlan(get_engine().plan(voice, text), cache_key=key)
+    if max_duration:
+        plan = fit_narration_plan(plan, voice, text, max_duration, max_pause)
+    plan.max_pause = max_pause
+    return plan
+
+
+def narration_output_path(voice):
     output_folder = r"temp"
     os.makedirs(output_folder, exist_ok=True)
     this_audio_save_index = len(os.listdir(output_folder))
-    files_in_dir = os.listdir(output_folder)
-    pipeline = KPipeline(lang_code="a", repo_id="hexgrad/Kokoro-82M")
-    generator = pipeline(text, voice=voice)
-
-    part_file_paths = []
-    for i, (gs, ps, audio) in enumerate(generator):
-        file_name = f"{voice}_{len(files_in_dir) + 1}_{i+1}.wav"
-        file_path = os.path.join(output_folder, file_name)
-        sf.write(file_path, audio, 24000)
-        part_file_paths.append(file_path)
-
-    combined_audio_file_path = f"{output_folder}/{this_audio_save_index}_{voice}.wav"
-    concatenate_wav_files(part_file_paths, combined_audio_file_path)
-    clear_narrations(part_file_paths)
-    duration = get_wav_duration(combined_audio_file_path)
-    return combined_audio_file_path, duration
+    return f"{output_folder}/{this_audio_save_index}_{voice}.wav"
+
+
+def synthesize_to_file(voice, text, output_path, max_duration=None, max_pause=None):
+    """
+    Narrates text into output_path.
+    Returns {output_path, duration, chunk_offsets, word_timings}.
+    """
+    narration = synthesize(voice, text, max_duration, max_pause)
+    narration.save(output_path)
+    return {
+        "output_path": output_path,
+        "duration": narration.duration,
+        "chunk_offsets": narration.chunk_offsets,
+        "word_timings": narration.word_timings,
+    }
+
+
+def request_daemon_file(voice, text, output_path, max_duration=None, max_pause=None):
+    """Has the TTS daemon narrate into output_path. Returns its response, or None if it failed."""
+    try:
+        return request_narration({
+            "voice": voice,
+            "text": text,
+            "output_path": os.path.abspath(output_path),
+            "max_duration": max_duration,
+            "max_pause": max_pause,
+        })
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"[!] TTS daemon unavailable, narrating in-process: {e}")
+        return None
+
+
+def request_daemon_narration(voice, text, max_duration=None, max_pause=None):
+    """Narration from the TTS daemon, read back into memory, or None if it failed."""
+    output_path = narration_output_path(voice)
+    result = request_daemon_file(voice, text, output_path, max_duration, max_pause)
+    if result is None:
+        return None
+    audio, sample_rate = sf.read(output_path, dtype="float32")
+    os.remove(output_path)
+    print(f"[3] Narrated by the TTS daemon")
+    return Narration(audio, result["chunk_offsets"], result.get("word_timings"), sample_rate)
+
+
+def narrate(voice, text, max_duration=None):
+    """
+    Narrates text into temp/. With max_duration (seconds), speech is sped
+    up as needed (up to MAX_NARRATION_SPEED) to fit. Returns (path, duration).
+    """
+    text = remove_emojis_from_text(text)
+
+    combined_audio_file_path = narration_output_path(voice)
+
+    # a cache hit needs neither the daemon nor a model
+    narration = load_narration_from_cache(narration_cache_key(text, voice))
+    if narration is not None and (not max_duration or narration.duration <= max_duration):
+        narration.save(combined_audio_file_path)
+        return combined_audio_file_path, narration.duration
+
+    result = None
+    if daemon_available():
+        result = request_daemon_file(voice, text, combined_audio_file_path, max_duration)
+    if result is None:
+        result = synthesize_to_file(voice, text, combined_audio_file_path, max_duration)
+
+    return combined_audio_file_path, result["duration"]
 
 
 if __name__ == "__main__":
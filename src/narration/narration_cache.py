@@ -0,0 +1,110 @@
+"""
+Content-addressed cache of finished narrations.
+
+The same text gets narrated again on re-renders, variants and test runs.
+Entries are keyed by a hash of the (emoji-stripped) text, voice, speed and
+model revision, and store the audio as int16 alongside the chunk offsets
+and word timings, so a hit needs no model work at all. The cache is kept
+under a byte budget by evicting the least recently used entries (by mtime,
+which loads refresh).
+"""
+
+import hashlib
+import json
+import os
+import re
+import zipfile
+
+import numpy as np
+
+from src.narration.tts_engine import PROJECT_ROOT, MODEL_REVISION
+
+NARRATION_CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "narration_cache")
+NARRATION_CACHE_MAX_BYTES = int(os.environ.get("NARRATION_CACHE_MB", "1024")) * 1024 * 1024
+
+
+def remove_emojis_from_text(text):
+    emoji_pattern = re.compile(
+        "["
+        "\U0001f600-\U0001f64f"  # emoticons
+        "\U0001f300-\U0001f5ff"  # symbols & pictographs
+        "\U0001f680-\U0001f6ff"  # transport & map symbols
+        "\U0001f700-\U0001f77f"  # alchemical symbols
+        "\U0001f1e0-\U0001f1ff"  # flags (iOS)
+        "]+",
+        flags=re.UNICODE,
+    )
+    return emoji_pattern.sub(r"", text)
+
+
+def narration_cache_key(text, voice, speed=1, revision=MODEL_REVISION):
+    # 1 and 1.0 are the same speed
+    if float(speed).is_integer():
+        speed = int(speed)
+    payload = json.dumps([text.strip(), voice, speed, revision])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(NARRATION_CACHE_DIR, f"{key}.npz")
+
+
+def load_cached_narration(key):
+    """Returns {audio, sample_rate, chunk_offsets, word_timings} or None."""
+    path = _entry_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as entry:
+            audio = entry["audio"].astype(np.float32) / 32767
+            meta = json.loads(str(entry["meta"]))
+        os.utime(path)
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        print(f"[!] Dropping unreadable narration cache entry {key[:12]}: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    return dict(meta, audio=audio)
+
+
+def store_cached_narration(key, audio, sample_rate, chunk_offsets, word_timings):
+    os.makedirs(NARRATION_CACHE_DIR, exist_ok=True)
+    meta = {
+        "sample_rate": sample_rate,
+        "chunk_offsets": chunk_offsets,
+        "word_timings": word_timings,
+    }
+    samples = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+    path = _entry_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, audio=samples, meta=np.array(json.dumps(meta)))
+    os.replace(tmp_path, path)
+    evict_narration_cache()
+
+
+def evict_narration_cache(max_bytes=NARRATION_CACHE_MAX_BYTES):
+    """Deletes the least recently used entries until the cache fits max_bytes."""
+    entries = []
+    for name in os.listdir(NARRATION_CACHE_DIR):
+        if not name.endswith(".npz"):
+            continue
+        path = os.path.join(NARRATION_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
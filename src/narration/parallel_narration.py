@@ -0,0 +1,149 @@
+"""
+Chunk-parallel narration across worker processes.
+
+Kokoro chunks are independent once the voice pack is known, but torch's
+intra-op threads stop helping early on these small convs. With
+TTS_WORKERS=K (K > 1) the parent process does G2P and chunking and sends
+the chunks to K worker processes, each running on cores/K threads, then
+reassembles the results in order. Planned narrations (NarrationPlan)
+predict durations in the parent, which is cheap, and only send the
+decoder work to the workers.
+
+Where fork is available, workers inherit the engine's model, so K
+workers cost one copy of the weights: memory-mapped safetensors weights
+are shared through the page cache as they are, and other weights are
+moved to shared memory first. Elsewhere each worker loads its own model,
+with the engine's precision and STFT backend so its audio matches
+MODEL_REVISION.
+
+Forking a process whose OpenMP or other threads are already running can
+deadlock, so the pool is never started lazily. Entry points that narrate
+in-process (cli.py make, cron.py, the render service and the TTS daemon)
+call start_parallel_narrator once from the main thread at start-up,
+before they start any threads or run any inference. Elsewhere (the GUI)
+narration runs on the engine alone.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+
+import torch
+
+from narration.kokoro.model import KModel
+from narration.kokoro.pipeline import KPipeline
+from src.narration.tts_engine import (
+    daemon_available, get_engine, KOKORO_WEIGHTS_DIR, LANG_CODE, TTS_PRECISION, TTS_STFT_BACKEND
+)
+
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", "0"))
+
+# Set in each worker, inherited through fork or loaded by _init_spawned_worker
+_worker_model = None
+
+
+def _init_forked_worker(threads):
+    torch.set_num_threads(threads)
+
+
+def _init_spawned_worker(threads, repo_id):
+    global _worker_model
+    torch.set_num_threads(threads)
+    _worker_model = KModel(
+        repo_id=repo_id, precision=TTS_PRECISION, stft_backend=TTS_STFT_BACKEND,
+        weights_dir=KOKORO_WEIGHTS_DIR,
+    ).freeze_for_inference()
+
+
+def _infer_chunk(phonemes, ref_s, speed):
+    output = _worker_model(phonemes, torch.from_numpy(ref_s), speed, return_output=True)
+    return output.audio.numpy(), output.pred_dur.numpy()
+
+
+def _vocode_chunk(prediction):
+    return _worker_model.vocode(prediction).numpy()
+
+
+class ParallelNarrator:
+    def __init__(self, engine, workers):
+        global _worker_model
+
+        if not isinstance(engine.model, KModel) or engine.model.device.type != "cpu":
+            raise ValueError("Parallel narration needs the torch backend on CPU")
+        self.engine = engine
+        self.workers = workers
+        threads = max(1, (os.cpu_count() or 1) // workers)
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            # share_memory() would copy mapped weights out of the page cache
+            if not engine.model.weights_mapped:
+                engine.model.share_memory()
+            _worker_model = engine.model
+            context = multiprocessing.get_context("fork")
+            self.pool = context.Pool(workers, _init_forked_worker, (threads,))
+        else:
+            context = multiprocessing.get_context("spawn")
+            self.pool = context.Pool(workers, _init_spawned_worker, (threads, engine.repo_id))
+        atexit.register(self.pool.terminate)
+        # G2P isn't thread safe
+        self._lock = threading.Lock()
+        print(f"[TTS] Started {workers} narration workers ({threads} threads each)")
+
+    def synthesize(self, voice, text, speed=1, lang_code=LANG_CODE):
+        """Same results as TTSEngine.synthesize, with chunks inferred in parallel."""
+        with self._lock:
+            pipeline = self.engine.pipeline(lang_code)
+            pack = pipeline.load_voice(voice)
+            chunks = list(pipeline.iter_chunks(text))
+
+        outputs = self.pool.starmap(
+            _infer_chunk,
+            [(ps, pack[len(ps) - 1].numpy(), speed) for _, ps, _, _ in chunks],
+            chunksize=1,
+        )
+
+        results = []
+        for (gs, ps, tks, text_index), (audio, pred_dur) in zip(chunks, outputs):
+            output = KModel.Output(audio=torch.from_numpy(audio), pred_dur=torch.from_numpy(pred_dur))
+            if tks is not None:
+                KPipeline.join_timestamps(tks, output.pred_dur)
+            results.append(KPipeline.Result(
+                graphemes=gs, phonemes=ps, tokens=tks, output=output, text_index=text_index
+            ))
+        return results
+
+    def vocode(self, results, lang_code=LANG_CODE):
+        """Same as TTSEngine.vocode, with chunks decoded in parallel."""
+        planned = [r for r in results if r.prediction is not None]
+        audios = self.pool.map(_vocode_chunk, [r.prediction for r in planned], chunksize=1)
+        for result, audio in zip(planned, audios):
+            result.output.audio = torch.from_numpy(audio)
+            result.prediction = None
+        return results
+
+
+_narrator = None
+
+
+def start_parallel_narrator():
+    """
+    Loads the engine and starts the worker pool if TTS_WORKERS > 1 and this
+    process narrates in-process (the TTS daemon isn't up). Call once from
+    the main thread at start-up, before starting other threads.
+    """
+    global _narrator
+    if TTS_WORKERS <= 1 or _narrator is not None or daemon_available():
+        return _narrator
+    if threading.current_thread() is not threading.main_thread():
+        raise RuntimeError("start_parallel_narrator has to run on the main thread")
+    try:
+        _narrator = ParallelNarrator(get_engine(), TTS_WORKERS)
+    except ValueError as e:
+        print(f"[!] Parallel narration disabled: {e}")
+    return _narrator
+
+
+def get_parallel_narrator():
+    """The process-wide parallel narrator, or None unless start_parallel_narrator started one."""
+    return _narrator
@@ -0,0 +1,103 @@
+"""
+Shortens long pauses in narration audio.
+
+Kokoro leaves silence at chunk boundaries and after punctuation, and every
+second of it becomes a second of scroll, sludge, blur and encode. Silent
+runs are found from per-frame RMS (relative to the loudest frame) and
+capped at a maximum pause, keeping half of it on each side of the cut.
+Timestamps are shifted by the audio removed before them, so word timings
+and chunk offsets stay aligned with the compacted audio.
+"""
+
+import numpy as np
+
+# Pauses longer than this many seconds are cut down to it
+MAX_PAUSE_SECONDS = 0.35
+# Shortest cap used when a narration has to shrink to a length planned in advance
+MIN_PAUSE_SECONDS = 0.15
+# Frames this far below the loudest frame count as silence
+SILENCE_DB = -40
+FRAME_SECONDS = 0.01
+
+
+def find_silent_runs(audio, sample_rate, silence_db=SILENCE_DB, frame_seconds=FRAME_SECONDS):
+    """(starts, ends) sample indices of the silent runs in audio."""
+    frame = max(1, int(sample_rate * frame_seconds))
+    frame_count = -(-len(audio) // frame)
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    frames = np.zeros(frame_count * frame, dtype=np.float32)
+    frames[: len(audio)] = audio
+    rms = np.sqrt(np.mean(frames.reshape(frame_count, frame) ** 2, axis=1))
+    silent = rms <= rms.max() * 10 ** (silence_db / 20)
+
+    edges = np.diff(np.concatenate([[0], silent.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1) * frame
+    ends = np.minimum(np.flatnonzero(edges == -1) * frame, len(audio))
+    return starts, ends
+
+
+def compact_pauses(audio, sample_rate, max_pause=MAX_PAUSE_SECONDS, silence_db=SILENCE_DB):
+    """
+    Returns (compacted audio, cuts), where cuts is an (n, 2) array of the
+    removed [start, end) sample ranges, for shift_times.
+    """
+    starts, ends = find_silent_runs(audio, sample_rate, silence_db)
+    keep = int(max_pause * sample_rate)
+    long_runs = (ends - starts) > keep
+    cuts = np.stack([starts[long_runs] + keep // 2, ends[long_runs] - (keep - keep // 2)], axis=1)
+    if len(cuts) == 0:
+        return audio, cuts
+
+    mask = np.ones(len(audio), dtype=bool)
+    # Mark cut starts +1 and ends -1, so the running sum is 1 inside cuts
+    marks = np.zeros(len(audio) + 1, dtype=np.int32)
+    np.add.at(marks, cuts[:, 0], 1)
+    np.add.at(marks, cuts[:, 1], -1)
+    mask[np.cumsum(marks[:-1]) > 0] = False
+    return audio[mask], cuts
+
+
+def shift_times(times, cuts, sample_rate):
+    """Maps times (seconds) in the original audio to the compacted audio."""
+    times = np.asarray(times, dtype=np.float64)
+    if len(cuts) == 0:
+        return times
+    samples = times * sample_rate
+    lengths = cuts[:, 1] - cuts[:, 0]
+    removed_before = np.concatenate([[0], np.cumsum(lengths)])
+    # Last cut starting at or before each time; times inside a cut land on its start
+    index = np.searchsorted(cuts[:, 0], samples, side="right") - 1
+    safe_index = np.maximum(index, 0)
+    removed = np.where(
+        index >= 0,
+        removed_before[safe_index] + np.clip(samples - cuts[safe_index, 0], 0, lengths[safe_index]),
+        0,
+    )
+    return (samples - removed) / sample_rate
+
+
+def estimate_removed_seconds(word_timings, duration, max_pause=MAX_PAUSE_SECONDS):
+    """
+    Seconds compact_pauses is expected to remove from a narration, from
+    the gaps between spoken words in its timings (and before the first and
+    after the last), for when there is no audio to measure yet.
+    """
+    words = [w for w in word_timings if any(c.isalnum() for c in w["word"])]
+    if not words:
+        return 0.0
+    edges = [0.0] + [t for w in words for t in (w["start"], w["end"])] + [duration]
+    gaps = np.diff(edges)[::2]
+    return float(np.maximum(gaps - max_pause, 0).sum())
+
+
+def compact_word_timings(word_timings, cuts, sample_rate):
+    """Word timings ([{word, start, end}] in seconds) shifted to match compacted audio."""
+    if not word_timings or len(cuts) == 0:
+        return word_timings
+    starts = shift_times([w["start"] for w in word_timings], cuts, sample_rate)
+    ends = shift_times([w["end"] for w in word_timings], cuts, sample_rate)
+    return [
+        dict(w, start=float(start), end=float(end))
+        for w, start, end in zip(word_timings, starts, ends)
+    ]
@@ -0,0 +1,193 @@
+"""
+Process-wide Kokoro TTS engine.
+
+Building a KPipeline with its own KModel resolves the model files, rebuilds
+every module and torch.loads the full state dict. Doing that for every
+narration is pure overhead, so this module keeps one warm KModel and one
+voice-pack cache per process and shares them across KPipelines (one per
+language), as the KModel docstring recommends.
+
+The engine can also run as a small daemon on a Unix socket so cli.py,
+cron.py, the GUI and the render service all narrate through one warm model:
+
+    poetry run python cli.py tts-serve
+
+narrate() and plan_narration() (the render path) use the daemon when its
+socket is up and the in-process engine otherwise.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+import torch
+
+from narration.kokoro.istftnet import DEFAULT_STFT_BACKEND
+from narration.kokoro.model import KModel
+from narration.kokoro.onnx_backend import ONNXModel
+from narration.kokoro.pipeline import KPipeline
+
+REPO_ID = "hexgrad/Kokoro-82M"
+LANG_CODE = "a"
+# Voice renders narrate with (and the batch CLI pre-narrates with by default)
+NARRATION_VOICE = "jf_alpha"
+# Chunks run through the model together; multi-chunk stories spend less
+# time in per-call overhead and get bigger GEMMs in ALBERT and the LSTMs
+BATCH_SIZE = 4
+# "torch", or "onnx" to run the exported graph with onnxruntime on CPU
+TTS_BACKEND = os.environ.get("TTS_BACKEND", "torch")
+# "fp32", "int8" or "bf16" for the torch backend (see KModel.__init__)
+TTS_PRECISION = os.environ.get("TTS_PRECISION", "fp32")
+# "torch", "custom" or "fft" for the decoder's STFT, unset for the default
+# (the recorded benchmark winner, see narration/kokoro/istftnet.py)
+TTS_STFT_BACKEND = os.environ.get("TTS_STFT_BACKEND") or DEFAULT_STFT_BACKEND
+# Set to 1 to torch.compile the decoder (see KModel.compile_for_inference)
+TTS_COMPILE = os.environ.get("TTS_COMPILE", "0") == "1"
+# Anything that changes the audio for the same text and voice
+MODEL_REVISION = (
+    f"{REPO_ID}:{KModel.MODEL_NAMES[REPO_ID]}:{TTS_BACKEND}:{TTS_PRECISION}:{TTS_STFT_BACKEND}"
+)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TORCH_COMPILE_CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "torch_compile_cache")
+# Memory-mappable safetensors conversions of the checkpoint (see narration/kokoro/weights.py)
+KOKORO_WEIGHTS_DIR = os.path.join(PROJECT_ROOT, "data", "kokoro_weights")
+TTS_SOCKET_PATH = os.environ.get(
+    "TTS_SOCKET_PATH", os.path.join(PROJECT_ROOT, "data", "tts_engine.sock")
+)
+
+
+class TTSEngine:
+    def __init__(self, repo_id=REPO_ID, device=None, backend=TTS_BACKEND, precision=TTS_PRECISION):
+        if device is None:
+            # int8 kernels are CPU only
+            device = "cuda" if torch.cuda.is_available() and precision == "fp32" else "cpu"
+        t = time.time()
+        self.repo_id = repo_id
+        weights = ""
+        if backend == "onnx":
+            device = "cpu (onnxruntime)"
+            self.model = ONNXModel(repo_id=repo_id)
+        else:
+            self.model = KModel(
+                repo_id=repo_id, precision=precision, stft_backend=TTS_STFT_BACKEND,
+                weights_dir=KOKORO_WEIGHTS_DIR,
+            ).to(device).freeze_for_inference()
+            weights = f", weights {self.model.load_seconds:.1f}s from {os.path.basename(self.model.weights_file)}"
+            if TTS_COMPILE:
+                self.model.compile_for_inference(cache_dir=TORCH_COMPILE_CACHE_DIR)
+        self.voices = {}
+        self.pipelines = {}
+        # G2P and the model aren't safe to drive from several threads at once
+        self._lock = threading.Lock()
+        print(f"[TTS] Loaded Kokoro model on {device} ({time.time()-t:.1f}s{weights})")
+
+    def pipeline(self, lang_code):
+        """KPipeline for a language, sharing this engine's model and voice packs."""
+        if lang_code not in self.pipelines:
+            pipeline = KPipeline(lang_code=lang_code, repo_id=self.repo_id, model=self.model)
+            pipeline.voices = self.voices
+            self.pipelines[lang_code] = pipeline
+        return self.pipelines[lang_code]
+
+    def synthesize(self, voice, text, speed=1, lang_code=LANG_CODE, batch_size=BATCH_SIZE):
+        """Runs the full pipeline and returns the list of KPipeline.Results."""
+        with self._lock:
+            pipeline = self.pipeline(lang_code)
+            return list(pipeline(text, voice=voice, speed=speed, batch_size=batch_size))
+
+    def plan(self, voice, text, speed=1, lang_code=LANG_CODE):
+        """
+        Phase one of synthesis (G2P and durations) as KPipeline.Results
+        without audio. Backends that can't split the model synthesize fully.
+        """
+        if not isinstance(self.model, KModel):
+            return self.synthesize(voice, text, speed, lang_code)
+        with self._lock:
+            pipeline = self.pipeline(lang_code)
+            return list(pipeline.plan(text, voice=voice, speed=speed))
+
+    def vocode(self, results, lang_code=LANG_CODE):
+        """Phase two: fills in the audio of results from plan()."""
+        with self._lock:
+            pipeline = self.pipeline(lang_code)
+            return [pipeline.vocode(r) if r.prediction is not None else r for r in results]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The process-wide engine, created on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TTSEngine()
+        return _engine
+
+
+def daemon_available(socket_path=TTS_SOCKET_PATH):
+    return hasattr(socket, "AF_UNIX") and os.path.exists(socket_path)
+
+
+def request_narration(request, socket_path=TTS_SOCKET_PATH, timeout=600):
+    """Sends one request dict to the daemon and returns its response dict."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with client.makefile("r", encoding="utf-8") as reader:
+            response = json.loads(reader.readline())
+    if "error" in response:
+        raise RuntimeError(f"TTS daemon error: {response['error']}")
+    return response
+
+
+class TTSRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        from src.narration.narrarate import synthesize_to_file
+
+        try:
+            request = json.loads(self.rfile.readline())
+            t = time.time()
+            response = synthesize_to_file(
+                request["voice"], request["text"], request["output_path"],
+                request.get("max_duration"), request.get("max_pause"),
+            )
+            print(f"[TTS] {len(request['text'])} chars -> {request['output_path']} ({time.time()-t:.1f}s)")
+        except Exception as e:
+            print(f"[TTS] Request failed: {e}")
+            response = {"error": str(e)}
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+def serve(socket_path=TTS_SOCKET_PATH):
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("The TTS daemon needs Unix domain sockets")
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+
+    from src.narration.parallel_narration import start_parallel_narrator
+
+    get_engine()
+    # Before the server starts its request threads
+    start_parallel_narrator()
+    server = socketserver.ThreadingUnixStreamServer(socket_path, TTSRequestHandler)
+    server.daemon_threads = True
+    print(f"[TTS] Listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[TTS] Shutting down...")
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,125 @@
+"""
+Small dependency-graph executor for the stages of a single render.
+
+Each Stage declares the named values it reads (inputs) and the named values
+it produces (outputs). StageGraph.run starts every stage whose inputs are
+available on a thread pool, so stages that don't depend on each other run
+at the same time. Values passed in up front skip the stages that would
+have produced them.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class Stage:
+    def __init__(self, name, fn, inputs=(), outputs=()):
+        """
+        :param name: label used in errors and progress events
+        :param fn: called with one keyword argument per input
+        :param inputs: names of the values fn needs
+        :param outputs: names of the values fn returns (a tuple if more than one)
+        """
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+
+    def run(self, values):
+        result = self.fn(**{key: values[key] for key in self.inputs})
+        if not self.outputs:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if len(result) != len(self.outputs):
+            raise ValueError(
+                f"Stage '{self.name}' returned {len(result)} values, expected {len(self.outputs)}"
+            )
+        return dict(zip(self.outputs, result))
+
+
+class StageGraph:
+    def __init__(self, stages, max_workers=4):
+        self.stages = list(stages)
+        self.max_workers = max_workers
+
+        self.producers = {}
+        for stage in self.stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(
+                        f"'{output}' is produced by both '{self.producers[output]}' and '{stage.name}'"
+                    )
+                self.producers[output] = stage.name
+
+    def run(self, initial=None, thread_callback=None, on_event=None):
+        """
+        Runs every stage whose outputs aren't already in initial.
+
+        :param initial: dict of values known before the run
+        :param thread_callback: called first thing on each pool thread
+            (the GUI uses this to route a thread's prints to its terminal)
+        :param on_event: called with a dict for every stage start and finish
+        :return: dict of all initial and produced values
+        """
+        values = dict(initial or {})
+        pending = [
+            stage for stage in self.stages
+            if not stage.outputs or not all(o in values for o in stage.outputs)
+        ]
+        total = len(pending)
+
+        available = set(values)
+        for stage in pending:
+            available.update(stage.outputs)
+        for stage in pending:
+            missing = [i for i in stage.inputs if i not in available]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {missing}, which nothing produces")
+
+        def emit(event):
+            if on_event:
+                on_event(event)
+
+        def run_stage(stage, stage_values):
+            if thread_callback:
+                thread_callback()
+            return stage.run(stage_values)
+
+        running = {}
+        started = {}
+        completed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                ready = [s for s in pending if all(i in values for i in s.inputs)]
+                for stage in ready:
+                    pending.remove(stage)
+                    started[stage.name] = time.time()
+                    emit({"type": "start", "stage": stage.name, "completed": completed, "total": total})
+                    running[executor.submit(run_stage, stage, dict(values))] = stage
+
+                if not running:
+                    names = [s.name for s in pending]
+                    raise ValueError(f"Stages {names} can never run (dependency cycle)")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        outputs = future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    values.update(outputs)
+                    completed += 1
+                    emit({
+                        "type": "done",
+                        "stage": stage.name,
+                        "completed": completed,
+                        "total": total,
+                        "elapsed": time.time() - started[stage.name],
+                        "outputs": outputs,
+                    })
+
+        return values
@@ -0,0 +1,87 @@
+"""
+Thin client for the local render service (see server.py).
+
+cli.py, cron.py and the GUI use this when the service is running and fall
+back to rendering in-process when it isn't.
+"""
+
+import json
+import os
+
+import requests
+
+from src.render_service.server import DEFAULT_HOST, DEFAULT_PORT
+
+
+def default_service_url():
+    return os.environ.get("RENDER_SERVICE_URL", f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+
+
+def format_event(event):
+    """One-line, human readable version of a progress event."""
+    if event["type"] == "status":
+        text = f"[RENDER {event['job_id']}] {event['status']}"
+        if event.get("error"):
+            text += f" ({event['error']})"
+        return text
+
+    text = f"[RENDER {event['job_id']}] {event['percent']:5.1f}% {event['stage']} {event['state']}"
+    if "elapsed" in event:
+        text += f" ({event['elapsed']:.1f}s"
+        if "fps" in event:
+            text += f", {event['fps']:.0f} fps"
+        text += ")"
+    return text
+
+
+class RenderClient:
+    def __init__(self, url=None):
+        self.url = (url or default_service_url()).rstrip("/")
+
+    def is_available(self):
+        try:
+            response = requests.get(f"{self.url}/health", timeout=0.5)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def submit(self, post_url=None, options=None):
+        response = requests.post(
+            f"{self.url}/jobs",
+            json={"post_url": post_url, "options": options or {}},
+            timeout=5,
+        )
+        response.raise_for_status()
+        return response.json()["job"]
+
+    def get_job(self, job_id):
+        response = requests.get(f"{self.url}/jobs/{job_id}", timeout=5)
+        response.raise_for_status()
+        return response.json()["job"]
+
+    def stream_events(self, job_id, since=0):
+        """Yields progress events for a job until it finishes."""
+        with requests.get(
+            f"{self.url}/jobs/{job_id}/events",
+            params={"since": since},
+            stream=True,
+            timeout=(5, None),
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def run_job(self, post_url=None, options=None, on_event=None, stop_flag=None):
+        """
+        Submits a job and follows its events until it finishes.
+        Returns the finished job dict. If stop_flag gets set we stop
+        watching, but the job keeps running on the service.
+        """
+        job = self.submit(post_url, options)
+        for event in self.stream_events(job["id"]):
+            if on_event:
+                on_event(event)
+            if stop_flag and stop_flag.is_set():
+                break
+        return self.get_job(job["id"])
@@ -0,0 +1,332 @@
+"""
+Long-running local render service.
+
+cli.py, cron.py and the GUI used to import video_maker and render in their
+own process, each paying the imports and model loading and fighting over
+the same cores. The service keeps video_maker (and the models behind it)
+loaded in one process, queues submitted jobs and runs them on its own
+worker threads, and streams progress events back to whoever is watching.
+
+HTTP API (JSON, localhost only):
+    GET  /health                  service status and queue length
+    POST /jobs                    {"post_url": optional, "options": {...}} -> job
+    GET  /jobs                    all jobs
+    GET  /jobs/<id>               one job
+    GET  /jobs/<id>/events?since=N
+                                  newline-delimited JSON events, streamed
+                                  until the job finishes
+
+Run with: poetry run python cli.py serve
+"""
+
+import json
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# scroll_image renders at 30fps, everything downstream keeps that rate
+FRAME_RATE = 30
+# Stages that encode video frames; their finish events report fps
+FRAME_STAGES = ("scroll", "sludge", "stack", "background")
+# The graph's stages account for this much of a job's progress, metadata
+# and saving the rest
+GRAPH_PERCENT = 90
+
+
+class RenderJob:
+    def __init__(self, post_url=None, options=None):
+        self.id = str(uuid.uuid4())[:8]
+        self.post_url = post_url
+        self.options = options or {}
+        self.status = "queued"  # queued -> running -> done | failed
+        self.error = None
+        self.result = None
+        self.submitted_at = time.time()
+        self.events = []
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def add_event(self, event):
+        with self._cond:
+            event = dict(event, job_id=self.id, seq=len(self.events), time=time.time())
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def set_status(self, status, error=None, result=None):
+        # One critical section, result before status: anyone who sees the
+        # job finished also sees its result and its final event
+        with self._cond:
+            self.error = error
+            self.result = result
+            self.status = status
+            self.add_event({"type": "status", "status": status, "error": error})
+
+    def wait_for_events(self, since, timeout=1.0):
+        """Returns events[since:], waiting up to timeout for new ones."""
+        with self._cond:
+            if len(self.events) <= since and not self.finished:
+                self._cond.wait(timeout)
+            return self.events[since:]
+
+    def to_dict(self):
+        with self._cond:
+            return {
+                "id": self.id,
+                "post_url": self.post_url,
+                "options": self.options,
+                "status": self.status,
+                "error": self.error,
+                "result": self.result,
+                "submitted_at": self.submitted_at,
+            }
+
+
+class RenderService:
+    def __init__(self, output_dir="final_vids", workers=1):
+        """
+        :param output_dir: default folder for finished videos
+        :param workers: jobs rendered at once. Renders share fixed temp/
+            paths, so leave this at 1 unless that changes.
+        """
+        self.output_dir = output_dir
+        self.workers = workers
+        self.jobs = {}
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        # Sludge window for whichever render starts next, planned (and its
+        # reads warmed) while the previous one renders. Clients submit one
+        # job and wait for it, so the queue is usually empty and can't say
+        # which job comes next; any job can use the window, so it doesn't
+        # need to know.
+        self._planner = ThreadPoolExecutor(max_workers=1)
+        self._next_window = None
+
+    def start(self):
+        # import once, up front, so every job runs warm
+        t = time.time()
+        import video_maker  # noqa: F401
+
+        print(f"[SERVICE] Render modules loaded ({time.time()-t:.1f}s)")
+        self._plan_next_window()
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f"render-worker-{i}", daemon=True).start()
+
+    def submit(self, post_url=None, options=None):
+        job = RenderJob(post_url, options)
+        with self._lock:
+            self.jobs[job.id] = job
+        job.add_event({"type": "status", "status": "queued", "error": None})
+        self.queue.put(job)
+        print(f"[SERVICE] Queued job {job.id} ({self.queue.qsize()} waiting)")
+        return job
+
+    def get_job(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._lock:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def _worker(self):
+        while True:
+            job = self.queue.get()
+            try:
+                self._run_job(job)
+            except Exception as e:
+                print(f"[SERVICE] Job {job.id} failed: {e}")
+                job.set_status("failed", error=str(e))
+            finally:
+                self.queue.task_done()
+
+    def _plan_next_window(self):
+        """Starts choosing and prefetching the sludge window for the next render."""
+        import video_maker
+
+        with self._lock:
+            self._next_window = self._planner.submit(video_maker.plan_sludge_window)
+
+    def _take_planned_window(self):
+        """The window planned for this render, or None to plan it in the render."""
+        with self._lock:
+            future, self._next_window = self._next_window, None
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"[!] Sludge window planning failed: {e}")
+            return None
+
+    def _run_job(self, job):
+        import video_maker
+
+        job.set_status("running")
+        sludge_window = self._take_planned_window()
+        # the render after this one gets its window warmed while this one runs
+        self._plan_next_window()
+        output_dir = job.options.get("output_dir", self.output_dir)
+        print(f"[SERVICE] Starting job {job.id}")
+        video_start = time.time()
+
+        job.add_event({"type": "stage", "stage": "prepare", "state": "start", "percent": 0})
+        post_image_save_path, post_data = video_maker.prepare_post_data(output_dir, post_url=job.post_url)
+        if post_image_save_path is None:
+            job.set_status("failed", error="no_eligible_posts")
+            return
+
+        narration_duration = {}
+
+        def on_stage_event(event):
+            percent = GRAPH_PERCENT * event["completed"] / max(event["total"], 1)
+            progress = {
+                "type": "stage",
+                "stage": event["stage"],
+                "state": event["type"],
+                "percent": round(percent, 1),
+            }
+            if event["type"] == "done":
+                progress["elapsed"] = round(event["elapsed"], 2)
+                outputs = event["outputs"]
+                if "narration_duration" in outputs:
+                    narration_duration["value"] = outputs["narration_duration"]
+                if event["stage"] in FRAME_STAGES and "value" in narration_duration and event["elapsed"] > 0:
+                    frames = narration_duration["value"] * FRAME_RATE
+                    progress["fps"] = round(frames / event["elapsed"], 1)
+            job.add_event(progress)
+
+        # metadata generation runs alongside the render
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            metadata_future = executor.submit(
+                video_maker.create_metadata,
+                post_data["title"], post_data["content"], post_data.get("url"),
+            )
+            narrated_video_path = video_maker.create_video_from_post(
+                post_image_save_path, post_data, on_event=on_stage_event,
+                sludge_window=sludge_window,
+            )
+            metadata_dict = metadata_future.result()
+
+        job.add_event({"type": "stage", "stage": "save", "state": "start", "percent": GRAPH_PERCENT})
+        scores = post_data.get("scores")
+        if scores:
+            metadata_dict.update(scores)
+        subfolder_path = video_maker.compile_video_and_metadata(
+            narrated_video_path, metadata_dict, output_dir
+        )
+        video_maker.cleanup_temp_files()
+
+        result = {
+            "title": post_data["title"],
+            "reddit_url": post_data.get("url"),
+            "folder": subfolder_path,
+            "qa": metadata_dict.get("qa"),
+            "seconds": round(time.time() - video_start, 1),
+        }
+        job.add_event({"type": "stage", "stage": "save", "state": "done", "percent": 100})
+        job.set_status("done", result=result)
+        print(f"[SERVICE] Finished job {job.id} in {result['seconds']}s")
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    service = None  # set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job_or_404(self, job_id):
+        job = self.service.get_job(job_id)
+        if job is None:
+            self._send_json(404, {"error": f"unknown job {job_id}"})
+        return job
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+
+        if parts == ["health"]:
+            self._send_json(200, {"status": "ok", "queued": self.service.queue.qsize()})
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": self.service.list_jobs()})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self._job_or_404(parts[1])
+            if job:
+                self._send_json(200, {"job": job.to_dict()})
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            job = self._job_or_404(parts[1])
+            if job:
+                since = int(parse_qs(url.query).get("since", ["0"])[0])
+                self._stream_events(job, since)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if parts != ["jobs"]:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": "body must be JSON"})
+            return
+
+        job = self.service.submit(payload.get("post_url"), payload.get("options"))
+        self._send_json(202, {"job": job.to_dict()})
+
+    def _stream_events(self, job, since):
+        # HTTP/1.0 response without a length: the stream ends when we close
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            while True:
+                events = job.wait_for_events(since)
+                for event in events:
+                    self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+                since += len(events)
+                self.wfile.flush()
+                if job.finished and since >= len(job.events):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, output_dir="final_vids", workers=1):
+    from src.narration.parallel_narration import start_parallel_narrator
+
+    # Jobs narrate in this process unless the TTS daemon is up; the
+    # TTS_WORKERS pool has to fork before the service starts its threads
+    start_parallel_narrator()
+    service = RenderService(output_dir=output_dir, workers=workers)
+    service.start()
+    RenderRequestHandler.service = service
+    server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.daemon_threads = True
+    print(f"[SERVICE] Listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[SERVICE] Shutting down...")
+    finally:
+        server.server_close()
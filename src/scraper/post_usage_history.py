@@ -0,0 +1,24 @@
+import os
+
+
+class PostUsageHistory:
+    def __init__(self):
+        self.fp = "data/post_usage_history.txt"
+
+        if not os.path.exists(self.fp):
+            with open(self.fp, "w") as f:
+                pass
+
+    def add_post(self, post_url):
+        with open(self.fp, "a") as f:
+            f.write(f"{post_url}\n")
+
+    def get_all_posts(self):
+        with open(self.fp, "r") as f:
+            return [line.strip() for line in f if line.strip()]
+
+    def post_exists(self, post_url):
+        existing_posts = self.get_all_posts()
+        if post_url in existing_posts:
+            return True
+        return False
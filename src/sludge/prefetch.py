@@ -0,0 +1,82 @@
+"""
+Page cache warming for upcoming renders.
+
+Sludge sources are multi-GB files on spinning disks, and the first read at
+a random offset stalls ffmpeg. Once the next render's sludge window is
+chosen, these helpers ask the OS to start reading that part of the file
+(and the small assets the render needs) while the current work carries on.
+"""
+
+import os
+import threading
+
+# Extra seconds of source read on each side of the window, since the byte
+# offset is estimated from the average bitrate rather than a keyframe index
+PREFETCH_MARGIN_SECONDS = 5
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+def _read_range(path, offset, length):
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                block = f.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+    except OSError as e:
+        print(f"[!] Prefetch of {path} failed: {e}")
+
+
+def prefetch_byte_range(path, offset, length):
+    """
+    Starts pulling a byte range of a file into the page cache without waiting.
+    Uses posix_fadvise(WILLNEED) where available and a background read
+    otherwise (Windows).
+    """
+    if hasattr(os, "posix_fadvise"):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+        return
+
+    threading.Thread(
+        target=_read_range, args=(path, offset, length), daemon=True
+    ).start()
+
+
+def estimate_window_bytes(video_path, source_duration, start_time, end_time):
+    """(offset, length) of the bytes covering start_time..end_time, plus margin."""
+    size = os.path.getsize(video_path)
+    bytes_per_second = size / source_duration
+    first = max(0.0, start_time - PREFETCH_MARGIN_SECONDS)
+    last = min(source_duration, end_time + PREFETCH_MARGIN_SECONDS)
+    offset = int(first * bytes_per_second)
+    length = min(size - offset, int((last - first) * bytes_per_second))
+    return offset, length
+
+
+def prefetch_sludge_window(window):
+    """Warms the page cache for a window picked by Extractor.choose_window."""
+    offset, length = estimate_window_bytes(
+        window["video_path"],
+        window["source_duration"],
+        window["start_time"],
+        window["end_time"],
+    )
+    prefetch_byte_range(window["video_path"], offset, length)
+    print(
+        f"[PREFETCH] {os.path.basename(window['video_path'])} "
+        f"{window['start_time']:.0f}-{window['end_time']:.0f}s ({length / 1e6:.0f}MB)"
+    )
+
+
+def prefetch_files(paths):
+    """Warms the page cache for whole (small) files, skipping missing ones."""
+    for path in paths:
+        if path and os.path.isfile(path):
+            prefetch_byte_range(path, 0, os.path.getsize(path))
@@ -34,26 +34,59 @@ def extract_and_resize(input_path, output_path, start_time, end_time, width, hei
     return output_path
 
 
+# Seconds skipped at the start and end of every source video
+SLUDGE_EDGE_MARGIN = 10
+
+
+def window_fits(window, target_duration):
+    """True if a chosen window's source still has room for target_duration from its start."""
+    return window["start_time"] + target_duration + SLUDGE_EDGE_MARGIN <= window["source_duration"]
+
+
 class Extractor:
     def __init__(self):
         self.videos_dir = r"sludge_videos"
 
-    def get_random_sludge_video(self, target_duration, output_path, expected_dims):
+    def choose_window(self, target_duration):
+        """
+        Picks a random source video and start time for a clip of target_duration.
+        Returns a dict with video_path, source_duration, start_time, end_time,
+        or None if the picked video is too short.
+        """
         video_extensions = (".mp4", ".avi", ".mkv", ".mov", ".webm")
         all_videos = [f for f in os.listdir(self.videos_dir) if f.lower().endswith(video_extensions)]
         random_video = random.choice(all_videos)
         base_sludge_video_path = os.path.join(self.videos_dir, random_video)
 
         duration = int(get_video_duration(base_sludge_video_path))
-        if duration < target_duration:
+        latest_start = int(duration - target_duration) - SLUDGE_EDGE_MARGIN
+        if latest_start <= SLUDGE_EDGE_MARGIN:
             print(f"Video {random_video} is too short ({duration}s), skipping.")
-            return False
-        possible_start_times = range(10, duration - target_duration - 10)
-        start_time = random.choice(possible_start_times)
+            return None
+        start_time = random.randrange(SLUDGE_EDGE_MARGIN, latest_start)
+        return {
+            "video_path": base_sludge_video_path,
+            "source_duration": duration,
+            "start_time": start_time,
+            "end_time": start_time + target_duration,
+        }
+
+    def get_random_sludge_video(self, target_duration, output_path, expected_dims, window=None):
+        """
+        Cuts a target_duration clip out of a random sludge video.
+        window: optional pre-chosen window (see choose_window), used when its
+        source has room for target_duration so a prefetched range gets read.
+        """
+        if window is None or not window_fits(window, target_duration):
+            window = self.choose_window(target_duration)
+            if window is None:
+                return False
+
+        start_time = window["start_time"]
         end_time = start_time + target_duration
 
         extract_and_resize(
-            base_sludge_video_path, output_path,
+            window["video_path"], output_path,
             start_time, end_time,
             expected_dims[0], expected_dims[1],
         )
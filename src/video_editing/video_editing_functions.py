@@ -1,4 +1,5 @@
 import cv2
+import os
 from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip
 
 
@@ -29,7 +30,12 @@ def stack_videos_vertically(top_video_path, bottom_video_path, out_video_path):
         raise RuntimeError("stack_videos_vertically failed")
 
 
-def add_audio_to_video(video_path, audio_path, out_video_path):
+def add_audio_to_video(video_path, audio_path, out_video_path, qa_report=None):
+    """
+    Muxes audio_path onto video_path (video stream copied, audio to aac).
+    If qa_report is a dict, silencedetect runs on the audio during the same
+    encode and its intervals are stored under qa_report["silence"].
+    """
     import subprocess
 
     cmd = [
@@ -37,6 +43,10 @@ def add_audio_to_video(video_path, audio_path, out_video_path):
         "-i", video_path,
         "-i", audio_path,
         "-c:v", "copy",
+    ]
+    if qa_report is not None:
+        cmd += ["-af", QA_SILENCE_FILTER]
+    cmd += [
         "-c:a", "aac",
         "-shortest",
         out_video_path,
@@ -47,9 +57,85 @@ def add_audio_to_video(video_path, audio_path, out_video_path):
         print(f"[!] ffmpeg error in add_audio_to_video: {result.stderr[-300:]}")
         return False
 
+    if qa_report is not None:
+        qa_report["silence"] = parse_detect_intervals(
+            result.stderr, "silence_start", "silence_end"
+        )
+
     return out_video_path
 
 
+# Output QA detectors. They ride along with the final encodes so checking a
+# render costs no extra decode. Any interval they report fails the video.
+QA_MIN_BLACK_SECONDS = 1.0
+QA_MIN_FREEZE_SECONDS = 2.0
+QA_MIN_SILENCE_SECONDS = 2.5
+QA_VIDEO_FILTERS = (
+    f"blackdetect=d={QA_MIN_BLACK_SECONDS}:pix_th=0.10,"
+    f"freezedetect=n=-60dB:d={QA_MIN_FREEZE_SECONDS}"
+)
+QA_SILENCE_FILTER = f"silencedetect=n=-50dB:d={QA_MIN_SILENCE_SECONDS}"
+
+
+def parse_detect_intervals(ffmpeg_log, start_key, end_key):
+    """
+    Pulls (start, end) intervals for one detector out of ffmpeg's stderr.
+    An interval still open at EOF gets end=None.
+    """
+    import re
+
+    pattern = re.compile(rf"({start_key}|{end_key}):\s*(-?[\d.]+)")
+    intervals = []
+    for match in pattern.finditer(ffmpeg_log):
+        key, value = match.group(1), float(match.group(2))
+        if key == start_key:
+            intervals.append([value, None])
+        elif intervals and intervals[-1][1] is None:
+            intervals[-1][1] = value
+    return intervals
+
+
+def evaluate_qa_report(qa_report):
+    """
+    Adds "failures" and "passed" to a report filled in by the final encodes.
+    A detector that never reported (its encode failed) and any encode listed
+    under "encode_errors" fail the video too.
+    """
+    failures = [f"{step} failed" for step in qa_report.get("encode_errors", [])]
+    for detector in ("black", "freeze", "silence"):
+        if detector not in qa_report:
+            failures.append(f"{detector} detector did not run")
+            continue
+        for start, end in qa_report[detector]:
+            end_text = f"{end:.2f}s" if end is not None else "end"
+            failures.append(f"{detector} {start:.2f}s-{end_text}")
+    qa_report["failures"] = failures
+    qa_report["passed"] = not failures
+    return qa_report
+
+
+def qa_report_path(video_path):
+    return f"{video_path}.qa.json"
+
+
+def save_qa_report(video_path, qa_report):
+    import json
+
+    with open(qa_report_path(video_path), "w") as f:
+        json.dump(qa_report, f, indent=4)
+
+
+def load_qa_report(video_path):
+    """Returns the QA report saved next to video_path, or None if there is none."""
+    import json
+
+    path = qa_report_path(video_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
 def get_video_duration(video_path):
     video = VideoFileClip(video_path)
     duration = video.duration
@@ -69,11 +155,14 @@ def get_video_dims(video_path):
     return width, height
 
 
-def add_fade_background(main_video, fade_video, output_path, output_dims=None, pad=40):
+def add_fade_background(main_video, fade_video, output_path, output_dims=None, pad=40, qa_report=None):
     """
     Single-pass ffmpeg: scales fade_video to output dims, blurs it,
     then overlays the main_video (shrunk by pad) centered on top.
     pad controls the minimum blurred border width on each side.
+    If qa_report is a dict, the composited frames are also split into a
+    blackdetect/freezedetect side branch and the detected intervals are
+    stored under qa_report["black"] and qa_report["freeze"].
     """
     import subprocess
 
@@ -103,12 +192,22 @@ def add_fade_background(main_video, fade_video, output_path, output_dims=None, p
         f"[0:v]scale={scaled_fg_width}:{scaled_fg_height}[fg];"
         f"[bg][fg]overlay={overlay_x}:{overlay_y}"
     )
+    if qa_report is not None:
+        # detectors hang off a split so they see the same frames as the encoder
+        filter_complex += (
+            f"[comp];[comp]split=2[out][qa];"
+            f"[qa]{QA_VIDEO_FILTERS},nullsink"
+        )
 
     cmd = [
         "ffmpeg", "-y",
         "-i", main_video,
         "-i", fade_video,
         "-filter_complex", filter_complex,
+    ]
+    if qa_report is not None:
+        cmd += ["-map", "[out]"]
+    cmd += [
         "-c:v", "libx264", "-preset", "fast", "-pix_fmt", "yuv420p",
         "-an", output_path
     ]
@@ -118,6 +217,16 @@ def add_fade_background(main_video, fade_video, output_path, output_dims=None, p
         print(f"[!] ffmpeg error in add_fade_background: {result.stderr[-300:]}")
         return False
 
+    if qa_report is not None:
+        qa_report["black"] = parse_detect_intervals(
+            result.stderr, "black_start", "black_end"
+        )
+        qa_report["freeze"] = parse_detect_intervals(
+            result.stderr, "freeze_start", "freeze_end"
+        )
+
+    return output_path
+
 
 def scroll_image(image_path, out_video_path, scroll_duration, height, width=None):
     import subprocess
@@ -85,9 +85,21 @@ def extract_metadata_from_folder(video_subfolder_path):
     sanitized = sanitize_metadata(metadata)
     sanitized["reddit_url"] = metadata.get("reddit_url", "")
     sanitized["repost_quality"] = metadata.get("repost_quality", 0)
+    sanitized["qa"] = metadata.get("qa")
     return sanitized
 
 
+def video_passed_qa(metadata):
+    """
+    False if the render's output QA found black, frozen or silent stretches.
+    Videos made before QA existed carry no report and are allowed through.
+    """
+    qa = metadata.get("qa")
+    if not qa:
+        return True
+    return qa.get("passed", True)
+
+
 def sanitize_metadata(metadata):
     def remove_chars(chars, string):
         for char in chars:
@@ -0,0 +1,63 @@
+"""Benchmark duration expansion. Compares the dense one-hot alignment matmul with the index_select gather KModel now uses."""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from narration.kokoro.model import KModel
+
+# Channels of d (hidden + style) and t_en, as in Kokoro-82M's config
+D_CHANNELS = 640
+T_EN_CHANNELS = 512
+CHUNK_LENGTHS = [32, 128, 256, 512]
+REPEATS = 20
+
+
+def dense_expand(d, t_en, pred_dur):
+    indices = torch.repeat_interleave(torch.arange(pred_dur.shape[0]), pred_dur)
+    pred_aln_trg = torch.zeros((pred_dur.shape[0], indices.shape[0]))
+    pred_aln_trg[indices, torch.arange(indices.shape[0])] = 1
+    pred_aln_trg = pred_aln_trg.unsqueeze(0)
+    return d @ pred_aln_trg, t_en @ pred_aln_trg, pred_aln_trg.numel() * pred_aln_trg.element_size()
+
+
+def gather_expand(d, t_en, pred_dur):
+    indices = KModel.alignment_indices(pred_dur)
+    return d.index_select(-1, indices), t_en.index_select(-1, indices), indices.numel() * indices.element_size()
+
+
+def time_it(fn, *args):
+    fn(*args)
+    t = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn(*args)
+    return (time.perf_counter() - t) / REPEATS * 1000, result
+
+
+def main():
+    torch.manual_seed(0)
+    passed = True
+    print(f"{'tokens':>6} {'frames':>7} {'dense ms':>9} {'gather ms':>10} {'dense MB':>9} {'gather KB':>10} {'equal':>6}")
+    for length in CHUNK_LENGTHS:
+        d = torch.randn(1, D_CHANNELS, length)
+        t_en = torch.randn(1, T_EN_CHANNELS, length)
+        pred_dur = torch.randint(1, 12, (length,))
+
+        dense_ms, (dense_en, dense_asr, dense_bytes) = time_it(dense_expand, d, t_en, pred_dur)
+        gather_ms, (gather_en, gather_asr, gather_bytes) = time_it(gather_expand, d, t_en, pred_dur)
+        equal = torch.equal(dense_en, gather_en) and torch.equal(dense_asr, gather_asr)
+        passed = passed and equal
+        print(
+            f"{length:>6} {int(pred_dur.sum()):>7} {dense_ms:>9.2f} {gather_ms:>10.2f} "
+            f"{dense_bytes / 1e6:>9.1f} {gather_bytes / 1e3:>10.1f} {str(equal):>6}"
+        )
+
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
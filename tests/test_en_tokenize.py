@@ -0,0 +1,123 @@
+"""Check KPipeline.en_tokenize against the original waterfall chunker on random token streams, and time both on long stories."""
+
+import sys
+import os
+import copy
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from narration.kokoro.pipeline import KPipeline
+
+CASES = 300
+STORY_TOKENS = [2000, 8000, 32000]
+PUNCTUATION = list("!.?…:;,—") + [")", "”"]
+
+
+@dataclass
+class Token:
+    # The fields of misaki's MToken that en_tokenize reads
+    text: str
+    phonemes: Optional[str]
+    whitespace: str
+
+
+def reference_waterfall_last(tokens, next_count, waterfall=["!.?…", ":;", ",—"], bumps=[")", "”"]):
+    for w in waterfall:
+        z = next((i for i, t in reversed(list(enumerate(tokens))) if t.phonemes in set(w)), None)
+        if z is None:
+            continue
+        z += 1
+        if z < len(tokens) and tokens[z].phonemes in bumps:
+            z += 1
+        if next_count - len(KPipeline.tokens_to_ps(tokens[:z])) <= 510:
+            return z
+    return len(tokens)
+
+
+def reference_en_tokenize(tokens):
+    """en_tokenize as it was before the single-pass rewrite."""
+    tks = []
+    pcount = 0
+    for t in tokens:
+        t.phonemes = "" if t.phonemes is None else t.phonemes
+        next_ps = t.phonemes + (" " if t.whitespace else "")
+        next_pcount = pcount + len(next_ps.rstrip())
+        if next_pcount > 510:
+            z = reference_waterfall_last(tks, next_pcount)
+            text = KPipeline.tokens_to_text(tks[:z])
+            ps = KPipeline.tokens_to_ps(tks[:z])
+            yield text, ps, tks[:z]
+            tks = tks[z:]
+            pcount = len(KPipeline.tokens_to_ps(tks))
+            if not tks:
+                next_ps = next_ps.lstrip()
+        tks.append(t)
+        pcount += len(next_ps)
+    if tks:
+        text = KPipeline.tokens_to_text(tks)
+        ps = KPipeline.tokens_to_ps(tks)
+        yield "".join(text).strip(), "".join(ps).strip(), tks
+
+
+def random_tokens(rng, count, punctuation_rate, word_length):
+    tokens = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < punctuation_rate:
+            p = rng.choice(PUNCTUATION)
+            tokens.append(Token(p, p, rng.choice(["", " "])))
+        elif roll < punctuation_rate + 0.02:
+            tokens.append(Token("", rng.choice([None, "", " "]), rng.choice(["", " "])))
+        else:
+            n = rng.randint(1, word_length)
+            tokens.append(Token("w" * n, "ə" * n, rng.choice(["", " ", " ", " "])))
+    return tokens
+
+
+def chunks(tokenize, tokens):
+    return [(text, ps, [id(t) for t in tks]) for text, ps, tks in tokenize(tokens)]
+
+
+def main():
+    rng = random.Random(0)
+    pipeline = object.__new__(KPipeline)  # en_tokenize doesn't touch instance state
+    passed = True
+
+    for case in range(CASES):
+        tokens = random_tokens(
+            rng, rng.randint(0, 1500), rng.choice([0.0, 0.01, 0.05, 0.2]), rng.choice([3, 12, 80, 600])
+        )
+        expected_tokens = copy.deepcopy(tokens)
+        expected = chunks(reference_en_tokenize, expected_tokens)
+        actual = chunks(pipeline.en_tokenize, tokens)
+        # Compare by position, since the two runs use separate token copies
+        positions = {id(t): i for i, t in enumerate(expected_tokens)}
+        expected = [(text, ps, [positions[i] for i in ids]) for text, ps, ids in expected]
+        positions = {id(t): i for i, t in enumerate(tokens)}
+        actual = [(text, ps, [positions[i] for i in ids]) for text, ps, ids in actual]
+        if actual != expected:
+            print(f"[!] Case {case}: {len(actual)} chunks vs {len(expected)} expected")
+            passed = False
+            break
+
+    print(f"{'tokens':>7} {'chunks':>7} {'reference ms':>13} {'single-pass ms':>15}")
+    for count in STORY_TOKENS:
+        tokens = random_tokens(random.Random(count), count, 0.01, 8)
+        reference_tokens = copy.deepcopy(tokens)
+        t = time.perf_counter()
+        n = len(list(reference_en_tokenize(reference_tokens)))
+        reference_ms = (time.perf_counter() - t) * 1000
+        t = time.perf_counter()
+        list(pipeline.en_tokenize(tokens))
+        single_pass_ms = (time.perf_counter() - t) * 1000
+        print(f"{count:>7} {n:>7} {reference_ms:>13.1f} {single_pass_ms:>15.1f}")
+
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
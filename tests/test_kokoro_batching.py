@@ -0,0 +1,56 @@
+"""Test batched Kokoro inference. Runs the same chunks one at a time and as one padded batch and compares the results."""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(PROJECT_ROOT)
+
+import torch
+
+from src.narration.tts_engine import get_engine, LANG_CODE
+
+VOICE = "jf_alpha"
+STORY = "\n".join([
+    "I never thought my neighbor would go that far over a parking spot.",
+    "After three years of silence, he finally called me back, and I let it ring.",
+    "Sometimes the smallest decisions lead to the biggest consequences in life.",
+    "When the doctor gave me the results, I broke down crying in the waiting room.",
+])
+
+# The decoder runs per item, so only the front end's float noise differs
+MAX_AUDIO_DIFF = 1e-3
+
+
+def main():
+    engine = get_engine()
+    pipeline = engine.pipeline(LANG_CODE)
+
+    t = time.time()
+    single = list(pipeline(STORY, voice=VOICE, batch_size=1))
+    single_time = time.time() - t
+
+    t = time.time()
+    batched = list(pipeline(STORY, voice=VOICE, batch_size=len(single)))
+    batched_time = time.time() - t
+
+    print(f"Chunks: {len(single)}")
+    print(f"One at a time: {single_time:.2f}s")
+    print(f"Batched: {batched_time:.2f}s")
+
+    passed = len(single) == len(batched)
+    for i, (a, b) in enumerate(zip(single, batched)):
+        same_durations = torch.equal(a.pred_dur, b.pred_dur)
+        same_length = a.audio.shape == b.audio.shape
+        diff = (a.audio - b.audio).abs().max().item() if same_length else float("inf")
+        print(f"  chunk {i}: pred_dur equal={same_durations}, max audio diff={diff:.2e}")
+        passed = passed and same_durations and diff <= MAX_AUDIO_DIFF
+
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
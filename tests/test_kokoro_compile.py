@@ -0,0 +1,81 @@
+"""Benchmark KModel.compile_for_inference. Times compilation and steady-state synthesis against eager at several chunk lengths, and checks the audio stays within the vocoder's run-to-run noise."""
+
+import sys
+import os
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(PROJECT_ROOT)
+
+import torch
+from huggingface_hub import hf_hub_download
+
+from narration.kokoro.model import KModel
+from narration.kokoro.onnx_backend import SAMPLE_PHONEMES, spectral_distance
+
+REPO_ID = "hexgrad/Kokoro-82M"
+VOICE = "af_heart"
+RUNS = 5
+# Phoneme counts; several lengths so dynamic shapes are exercised
+CHUNK_LENGTHS = [len(SAMPLE_PHONEMES), 2 * len(SAMPLE_PHONEMES) + 1, 4 * len(SAMPLE_PHONEMES) + 3]
+TOLERANCE = 1.5
+
+
+def chunk(length):
+    return " ".join([SAMPLE_PHONEMES] * (length // len(SAMPLE_PHONEMES) + 1))[:length]
+
+
+def time_model(model, pack):
+    """Returns first-call seconds per length, mean steady-state seconds per length and the outputs."""
+    first, steady, outputs = {}, {}, {}
+    for length in CHUNK_LENGTHS:
+        ps = chunk(length)
+        t = time.time()
+        outputs[length] = model(ps, pack[len(ps) - 1], return_output=True)
+        first[length] = time.time() - t
+        t = time.time()
+        for _ in range(RUNS):
+            model(ps, pack[len(ps) - 1])
+        steady[length] = (time.time() - t) / RUNS
+    return first, steady, outputs
+
+
+def main():
+    torch.manual_seed(0)
+    pack = torch.load(hf_hub_download(repo_id=REPO_ID, filename=f"voices/{VOICE}.pt"), weights_only=True)
+    cache_dir = tempfile.mkdtemp(prefix="kokoro_compile_")
+
+    eager_first, eager, reference = time_model(KModel(repo_id=REPO_ID).freeze_for_inference(), pack)
+    _, _, rerun = time_model(KModel(repo_id=REPO_ID).freeze_for_inference(), pack)
+    compiled_model = KModel(repo_id=REPO_ID).freeze_for_inference().compile_for_inference(cache_dir)
+    compiled_first, compiled, candidate = time_model(compiled_model, pack)
+    # A second model reuses the graphs cached on disk
+    cached_first, _, _ = time_model(
+        KModel(repo_id=REPO_ID).freeze_for_inference().compile_for_inference(cache_dir), pack
+    )
+
+    passed = True
+    print(f"{'phonemes':>8} {'eager ms':>9} {'compiled ms':>12} {'speedup':>8} {'1st call s':>11} {'cached 1st s':>13} {'spec L1':>8} {'noise':>7}")
+    for length in CHUNK_LENGTHS:
+        same_durations = torch.equal(reference[length].pred_dur, candidate[length].pred_dur)
+        same_length = reference[length].audio.shape == candidate[length].audio.shape
+        noise_floor = spectral_distance(reference[length].audio, rerun[length].audio)
+        distance = (
+            spectral_distance(reference[length].audio, candidate[length].audio) if same_length else float("inf")
+        )
+        passed = passed and same_durations and distance <= TOLERANCE * noise_floor + 1e-3
+        print(
+            f"{length:>8} {eager[length] * 1000:>9.0f} {compiled[length] * 1000:>12.0f} "
+            f"{eager[length] / compiled[length]:>7.2f}x {compiled_first[length]:>11.1f} "
+            f"{cached_first[length]:>13.1f} {distance:>8.4f} {noise_floor:>7.4f}"
+        )
+    print(f"Eager first call: {sum(eager_first.values()):.1f}s, compiled: {sum(compiled_first.values()):.1f}s, "
+          f"compiled from disk cache: {sum(cached_first.values()):.1f}s")
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Test KModel.freeze_for_inference. Compares a frozen model with an unfrozen one on the same seeded input, and times both."""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(PROJECT_ROOT)
+
+import torch
+from huggingface_hub import hf_hub_download
+
+from narration.kokoro.model import KModel
+from narration.kokoro.onnx_backend import SAMPLE_PHONEMES
+
+REPO_ID = "hexgrad/Kokoro-82M"
+VOICE = "af_heart"
+RUNS = 5
+# Folding weight_norm reorders float math, nothing more
+MAX_AUDIO_DIFF = 1e-3
+
+
+def time_model(model, ref_s):
+    torch.manual_seed(0)
+    output = model(SAMPLE_PHONEMES, ref_s, return_output=True)
+    t = time.time()
+    for _ in range(RUNS):
+        model(SAMPLE_PHONEMES, ref_s)
+    return output, (time.time() - t) / RUNS
+
+
+def main():
+    pack = torch.load(hf_hub_download(repo_id=REPO_ID, filename=f"voices/{VOICE}.pt"), weights_only=True)
+    ref_s = pack[len(SAMPLE_PHONEMES) - 1]
+
+    reference, reference_time = time_model(KModel(repo_id=REPO_ID).eval(), ref_s)
+    frozen, frozen_time = time_model(KModel(repo_id=REPO_ID).freeze_for_inference(), ref_s)
+
+    same_durations = torch.equal(reference.pred_dur, frozen.pred_dur)
+    same_length = reference.audio.shape == frozen.audio.shape
+    diff = (reference.audio - frozen.audio).abs().max().item() if same_length else float("inf")
+
+    print(f"Unfrozen: {reference_time * 1000:.0f}ms per call")
+    print(f"Frozen: {frozen_time * 1000:.0f}ms per call ({reference_time / frozen_time:.2f}x)")
+    print(f"pred_dur equal: {same_durations}")
+    print(f"Max audio diff: {diff:.2e}")
+
+    if same_durations and diff <= MAX_AUDIO_DIFF:
+        print("PASSED")
+    else:
+        print("FAILED")
+
+
+if __name__ == "__main__":
+    main()
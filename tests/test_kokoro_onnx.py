@@ -0,0 +1,24 @@
+"""Test the ONNX Runtime backend. Exports the graph if it's missing, then checks it against the torch path."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(PROJECT_ROOT)
+
+from narration.kokoro.onnx_backend import DEFAULT_ONNX_PATH, export_onnx, check_parity
+
+
+def main():
+    if not os.path.exists(DEFAULT_ONNX_PATH):
+        print(f"Exporting {DEFAULT_ONNX_PATH}...")
+        export_onnx(DEFAULT_ONNX_PATH)
+
+    passed = check_parity(DEFAULT_ONNX_PATH)
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Compare Kokoro precision modes (fp32, int8, bf16).
+
+Each mode synthesizes the same seeded texts in its own subprocess, so peak
+RSS is per mode. Reports real-time factor, peak RSS, waveform and
+log-spectrogram distance from fp32, and Whisper round-trip WER.
+"""
+
+import sys
+import os
+import json
+import re
+import subprocess
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(PROJECT_ROOT)
+
+VOICE = "jf_alpha"
+MODES = ["fp32", "int8", "bf16"]
+TEXTS = [
+    "I never thought my neighbor would go that far over a parking spot.",
+    "After three years of silence, he finally called me back, and I let it ring.",
+    "Sometimes the smallest decisions lead to the biggest consequences in life.",
+    "When the doctor gave me the results, I broke down crying in the waiting room.",
+    "He spent six years planning the perfect revenge and it worked flawlessly.",
+]
+SAMPLE_RATE = 24000
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(mode, out_dir):
+    """Synthesizes every text with one precision mode and writes wavs plus stats.json."""
+    import soundfile as sf
+    import torch
+
+    from narration.kokoro.model import KModel
+    from narration.kokoro.pipeline import KPipeline
+
+    model = KModel(repo_id="hexgrad/Kokoro-82M", precision=mode).freeze_for_inference()
+    pipeline = KPipeline(lang_code="a", repo_id="hexgrad/Kokoro-82M", model=model)
+    pipeline.load_voice(VOICE)
+
+    synth_seconds = 0.0
+    audio_seconds = 0.0
+    for i, text in enumerate(TEXTS):
+        torch.manual_seed(0)
+        t = time.time()
+        audio = torch.cat([r.audio for r in pipeline(text, voice=VOICE) if r.audio is not None])
+        synth_seconds += time.time() - t
+        audio_seconds += len(audio) / SAMPLE_RATE
+        sf.write(os.path.join(out_dir, f"{i}.wav"), audio.numpy(), SAMPLE_RATE)
+
+    stats = {
+        "mode": model.precision,
+        "rtf": synth_seconds / audio_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    with open(os.path.join(out_dir, "stats.json"), "w") as f:
+        json.dump(stats, f)
+
+
+def words(text):
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+def word_error_rate(reference, hypothesis):
+    ref, hyp = words(reference), words(hypothesis)
+    distances = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        previous, distances[0] = distances[0], i
+        for j, h in enumerate(hyp, 1):
+            previous, distances[j] = distances[j], min(
+                distances[j] + 1, distances[j - 1] + 1, previous + (r != h)
+            )
+    return distances[-1] / max(len(ref), 1)
+
+
+def compare(mode_dir, reference_dir, transcriber):
+    import soundfile as sf
+    import torch
+
+    from narration.kokoro.onnx_backend import spectral_distance
+
+    wave_diffs, spec_diffs, wers = [], [], []
+    for i, text in enumerate(TEXTS):
+        audio = torch.from_numpy(sf.read(os.path.join(mode_dir, f"{i}.wav"), dtype="float32")[0])
+        reference = torch.from_numpy(sf.read(os.path.join(reference_dir, f"{i}.wav"), dtype="float32")[0])
+        length = min(len(audio), len(reference))
+        wave_diffs.append((audio[:length] - reference[:length]).abs().mean().item())
+        spec_diffs.append(spectral_distance(audio[:length], reference[:length]))
+
+        segments, _ = transcriber.model.transcribe(os.path.join(mode_dir, f"{i}.wav"))
+        wers.append(word_error_rate(text, " ".join(s.text for s in segments)))
+
+    def mean(values):
+        return sum(values) / len(values)
+
+    return mean(wave_diffs), mean(spec_diffs), mean(wers)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        run_worker(sys.argv[2], sys.argv[3])
+        return
+
+    from src.transcription.transcriber_local import Transcriber
+
+    work_dir = tempfile.mkdtemp(prefix="kokoro_precision_")
+    stats = {}
+    for mode in MODES:
+        mode_dir = os.path.join(work_dir, mode)
+        os.makedirs(mode_dir)
+        print(f"Synthesizing with {mode}...")
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", mode, mode_dir],
+            check=True,
+        )
+        with open(os.path.join(mode_dir, "stats.json")) as f:
+            stats[mode] = json.load(f)
+
+    transcriber = Transcriber()
+    reference_dir = os.path.join(work_dir, "fp32")
+
+    print(f"\n{'mode':<6} {'ran as':<7} {'RTF':>6} {'RSS MB':>8} {'wave L1':>9} {'spec L1':>9} {'WER':>6}")
+    for mode in MODES:
+        wave_diff, spec_diff, wer = compare(os.path.join(work_dir, mode), reference_dir, transcriber)
+        rss = stats[mode]["peak_rss_mb"]
+        rss = f"{rss:.0f}" if rss is not None else "n/a"
+        print(
+            f"{mode:<6} {stats[mode]['mode']:<7} {stats[mode]['rtf']:>6.3f} {rss:>8} "
+            f"{wave_diff:>9.4f} {spec_diff:>9.4f} {wer:>6.1%}"
+        )
+    print(f"\nAudio saved under {work_dir}")
+
+
+if __name__ == "__main__":
+    main()
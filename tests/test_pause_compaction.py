@@ -0,0 +1,87 @@
+"""Check silent run detection, the pause cap and timestamp shifting in src/narration/pause_compaction.py."""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.narration.pause_compaction import (
+    find_silent_runs,
+    compact_pauses,
+    shift_times,
+    compact_word_timings,
+    estimate_removed_seconds,
+)
+
+# 10-sample frames, so every segment below is whole frames
+SAMPLE_RATE = 1000
+MAX_PAUSE = 0.35
+# (seconds, speech?) segments: a long pause that gets cut and a short one that stays
+SEGMENTS = [(0.5, True), (1.0, False), (0.5, True), (0.2, False), (0.3, True)]
+# The long pause runs 0.5-1.5s; keeping 0.35s of it cuts [0.675, 1.325)
+EXPECTED_RUNS = [(500, 1500), (2000, 2200)]
+EXPECTED_CUTS = [(675, 1325)]
+# original time -> compacted time: before, inside, at the end of, and after the cut
+EXPECTED_SHIFTS = {0.2: 0.2, 0.8: 0.675, 1.325: 0.675, 1.6: 0.95, 2.5: 1.85}
+
+
+def make_audio():
+    parts = []
+    for seconds, speech in SEGMENTS:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        parts.append(0.5 * np.sin(2 * np.pi * 110 * t) if speech else np.zeros_like(t))
+    return np.concatenate(parts).astype(np.float32)
+
+
+def check(name, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {name}{f': {detail}' if detail else ''}")
+    return ok
+
+
+def main():
+    audio = make_audio()
+    passed = True
+
+    starts, ends = find_silent_runs(audio, SAMPLE_RATE)
+    runs = list(zip(starts.tolist(), ends.tolist()))
+    passed &= check("silent runs", runs == EXPECTED_RUNS, runs)
+
+    compacted, cuts = compact_pauses(audio, SAMPLE_RATE, MAX_PAUSE)
+    passed &= check("cuts", cuts.tolist() == [list(c) for c in EXPECTED_CUTS], cuts.tolist())
+    removed = sum(end - start for start, end in EXPECTED_CUTS)
+    passed &= check("compacted length", len(compacted) == len(audio) - removed, len(compacted))
+    starts, ends = find_silent_runs(compacted, SAMPLE_RATE)
+    longest = int((ends - starts).max())
+    passed &= check("longest pause is the cap", longest == int(MAX_PAUSE * SAMPLE_RATE), longest)
+
+    shifted = shift_times(list(EXPECTED_SHIFTS), cuts, SAMPLE_RATE)
+    passed &= check(
+        "shift_times", np.allclose(shifted, list(EXPECTED_SHIFTS.values())),
+        dict(zip(EXPECTED_SHIFTS, np.round(shifted, 3).tolist())),
+    )
+
+    words = [
+        {"word": "one", "start": 0.0, "end": 0.5},
+        {"word": ",", "start": 0.5, "end": 0.6},
+        {"word": "two", "start": 1.5, "end": 2.0},
+        {"word": "three", "start": 2.2, "end": 2.5},
+    ]
+    moved = compact_word_timings(words, cuts, SAMPLE_RATE)
+    passed &= check(
+        "word timings", np.allclose([(w["start"], w["end"]) for w in moved][2:], [(0.85, 1.35), (1.55, 1.85)]),
+        [(round(w["start"], 3), round(w["end"], 3)) for w in moved],
+    )
+
+    estimate = estimate_removed_seconds(words, len(audio) / SAMPLE_RATE, MAX_PAUSE)
+    passed &= check("removed estimate", np.isclose(estimate, removed / SAMPLE_RATE), round(estimate, 3))
+
+    nothing, no_cuts = compact_pauses(audio[:500], SAMPLE_RATE, MAX_PAUSE)
+    passed &= check("nothing to cut", len(nothing) == 500 and len(no_cuts) == 0)
+
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Check that the render service plans and prefetches the next render's sludge
+window while the current render encodes, even though clients submit one job
+and wait for it (so the queue is empty whenever a render starts).
+video_maker is replaced with a stand-in whose encode just sleeps.
+"""
+
+import sys
+import os
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.render_service.server import RenderService
+
+JOB_COUNT = 3
+PLAN_SECONDS = 0.2
+ENCODE_SECONDS = 0.5
+
+
+def make_fake_video_maker(service, plans, encodes):
+    fake = types.ModuleType("video_maker")
+
+    def plan_sludge_window(narration_text=None, post_image_path=None):
+        window = {"id": len(plans)}
+        start = time.perf_counter()
+        plans.append(window)
+        time.sleep(PLAN_SECONDS)
+        window["planned"] = (start, time.perf_counter())
+        return window
+
+    def create_video_from_post(post_image_save_path, post_data, on_event=None, sludge_window=None):
+        queued = service.queue.qsize()
+        start = time.perf_counter()
+        time.sleep(ENCODE_SECONDS)
+        encodes.append({"window": sludge_window, "queued": queued, "span": (start, time.perf_counter())})
+        return "temp/narrated_final_video.mp4"
+
+    fake.plan_sludge_window = plan_sludge_window
+    fake.create_video_from_post = create_video_from_post
+    fake.prepare_post_data = lambda output_dir, post_url=None: (
+        "temp/post.png", {"title": "title", "content": "content", "url": None}
+    )
+    fake.create_metadata = lambda title, content, url=None: {}
+    fake.compile_video_and_metadata = lambda path, metadata, output_dir: "final_vids/test"
+    fake.cleanup_temp_files = lambda: None
+    return fake
+
+
+def overlaps(a, b):
+    return a[0] < b[1] and b[0] < a[1]
+
+
+def main():
+    service = RenderService()
+    plans, encodes = [], []
+    sys.modules["video_maker"] = make_fake_video_maker(service, plans, encodes)
+    service.start()
+
+    # Like RenderClient.run_job: submit one job, wait for it, then the next
+    for _ in range(JOB_COUNT):
+        job = service.submit()
+        since = 0
+        while not job.finished:
+            since += len(job.wait_for_events(since))
+        print(f"job {job.id}: {job.status}")
+
+    passed = all(job["status"] == "done" for job in service.list_jobs())
+    for i, encode in enumerate(encodes):
+        window = encode["window"]
+        if window is None:
+            print(f"render {i}: no planned window")
+            passed = False
+            continue
+        print(f"render {i}: window {window['id']}, {encode['queued']} queued at start")
+        if i > 0:
+            # planned while the previous render was encoding
+            overlapped = overlaps(window["planned"], encodes[i - 1]["span"])
+            print(f"  planned during render {i - 1}'s encode: {overlapped}")
+            passed = passed and overlapped
+
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Check the frame-rate excitation path (SourceModuleHnNSF.excitation) against SourceModuleHnNSF.forward, and time both."""
+
+import sys
+import os
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from narration.kokoro.istftnet import SourceModuleHnNSF
+
+# As Generator builds it for Kokoro-82M: upsample_rates [10, 6] times gen_istft_hop_size 5
+SAMPLE_RATE = 24000
+UPSAMPLE_SCALE = 300
+HARMONIC_NUM = 8
+VOICED_THRESHOLD = 10
+# F0 frames (80 per second of audio) for a few chunk lengths
+FRAME_COUNTS = [160, 800, 2400]
+REPEATS = 5
+MAX_SINE_DIFF = 1e-3
+MAX_NOISE_STD_RATIO_ERROR = 0.05
+
+
+def random_f0(frames):
+    """A pitch contour with unvoiced gaps, like the predictor's F0 curve."""
+    f0 = 120 + 60 * torch.sin(torch.linspace(0, 12, frames)) + 5 * torch.randn(frames)
+    f0[torch.rand(frames) < 0.25] = 0
+    return f0.unsqueeze(0)
+
+
+def time_it(fn, *args):
+    fn(*args)
+    t = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(*args)
+    return (time.perf_counter() - t) / REPEATS * 1000
+
+
+def main():
+    torch.manual_seed(0)
+    source = SourceModuleHnNSF(
+        sampling_rate=SAMPLE_RATE,
+        upsample_scale=UPSAMPLE_SCALE,
+        harmonic_num=HARMONIC_NUM,
+        voiced_threshod=VOICED_THRESHOLD,
+    ).eval()
+    upsample = torch.nn.Upsample(scale_factor=UPSAMPLE_SCALE)
+    passed = True
+
+    print(f"{'frames':>6} {'forward ms':>11} {'excitation ms':>14} {'sine diff':>10} {'noise std ratio':>16}")
+    with torch.no_grad():
+        for frames in FRAME_COUNTS:
+            f0_frames = random_f0(frames)
+            f0 = upsample(f0_frames[:, None]).transpose(1, 2)
+            f0_frames = f0_frames[:, :, None]
+
+            # Without noise the two paths must agree sample for sample
+            with mock.patch("torch.randn_like", lambda x: torch.zeros_like(x)):
+                expected = source(f0)[0]
+                actual = source.excitation(f0_frames, f0)
+            sine_diff = (expected - actual).abs().max().item()
+
+            # With noise, compare the spread each path adds around that clean signal
+            clean = torch.atanh(expected.clamp(-0.999999, 0.999999))
+            forward_noise = torch.atanh(source(f0)[0].clamp(-0.999999, 0.999999)) - clean
+            excitation_noise = torch.atanh(source.excitation(f0_frames, f0).clamp(-0.999999, 0.999999)) - clean
+            std_ratio = (excitation_noise.std() / forward_noise.std()).item()
+
+            forward_ms = time_it(source, f0)
+            excitation_ms = time_it(source.excitation, f0_frames, f0)
+            if sine_diff > MAX_SINE_DIFF or abs(std_ratio - 1) > MAX_NOISE_STD_RATIO_ERROR:
+                passed = False
+            print(f"{frames:>6} {forward_ms:>11.2f} {excitation_ms:>14.2f} {sine_diff:>10.2e} {std_ratio:>16.3f}")
+
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Check StageGraph's dependency order, concurrency, failure handling and progress events."""
+
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pipeline.stage_graph import Stage, StageGraph
+
+STAGE_SECONDS = 0.2
+
+
+def check(name, ok, detail=""):
+    print(f"{'ok  ' if ok else 'FAIL'} {name}{f': {detail}' if detail else ''}")
+    return ok
+
+
+def recording_graph(max_workers):
+    """
+    A diamond like VIDEO_STAGES: plan -> (scroll, sludge) -> stack.
+    Returns the graph and the (stage, start, end) spans it records.
+    """
+    spans = []
+    lock = threading.Lock()
+
+    def timed(name, fn):
+        def run(**kwargs):
+            start = time.perf_counter()
+            time.sleep(STAGE_SECONDS)
+            result = fn(**kwargs)
+            with lock:
+                spans.append((name, start, time.perf_counter()))
+            return result
+        return run
+
+    stages = [
+        Stage("plan", timed("plan", lambda post: (f"plan({post})", 3)),
+              inputs=["post"], outputs=["plan", "duration"]),
+        Stage("scroll", timed("scroll", lambda duration: f"scroll({duration})"),
+              inputs=["duration"], outputs=["scroll"]),
+        Stage("sludge", timed("sludge", lambda duration: f"sludge({duration})"),
+              inputs=["duration"], outputs=["sludge"]),
+        Stage("stack", timed("stack", lambda scroll, sludge: f"stack({scroll},{sludge})"),
+              inputs=["scroll", "sludge"], outputs=["stack"]),
+    ]
+    return StageGraph(stages, max_workers=max_workers), spans
+
+
+def test_order_and_concurrency():
+    graph, spans = recording_graph(max_workers=2)
+    events = []
+    values = graph.run({"post": "p"}, on_event=events.append)
+    passed = check("outputs", values["stack"] == "stack(scroll(3),sludge(3))", values["stack"])
+
+    span = {name: (start, end) for name, start, end in spans}
+    in_order = (
+        span["plan"][1] <= span["scroll"][0]
+        and span["plan"][1] <= span["sludge"][0]
+        and max(span["scroll"][1], span["sludge"][1]) <= span["stack"][0]
+    )
+    passed &= check("dependency order", in_order)
+    overlap = span["scroll"][0] < span["sludge"][1] and span["sludge"][0] < span["scroll"][1]
+    passed &= check("independent stages overlap", overlap)
+
+    starts = [e["stage"] for e in events if e["type"] == "start"]
+    dones = [e for e in events if e["type"] == "done"]
+    passed &= check("a start and a done per stage", sorted(starts) == sorted(e["stage"] for e in dones) and len(starts) == 4, starts)
+    passed &= check("completed counts up", [e["completed"] for e in dones] == [1, 2, 3, 4])
+    passed &= check("totals", all(e["total"] == 4 for e in events))
+    plan_done = next(e for e in dones if e["stage"] == "plan")
+    passed &= check("done carries outputs", plan_done["outputs"] == {"plan": "plan(p)", "duration": 3})
+    return passed
+
+
+def test_single_worker():
+    graph, spans = recording_graph(max_workers=1)
+    graph.run({"post": "p"})
+    spans.sort(key=lambda s: s[1])
+    serial = all(a[2] <= b[1] for a, b in zip(spans, spans[1:]))
+    return check("max_workers=1 runs one stage at a time", serial)
+
+
+def test_initial_values_skip_stages():
+    graph, spans = recording_graph(max_workers=2)
+    values = graph.run({"post": "p", "plan": "cached", "duration": 5})
+    ran = sorted(name for name, _, _ in spans)
+    passed = check("given outputs skip their stage", ran == ["scroll", "sludge", "stack"], ran)
+    return passed & check("given values flow on", values["stack"] == "stack(scroll(5),sludge(5))")
+
+
+def test_failure_stops_dependents():
+    ran = []
+
+    def fail(duration):
+        raise RuntimeError("sludge broke")
+
+    def record(name):
+        def run(**kwargs):
+            ran.append(name)
+            return name
+        return run
+
+    graph = StageGraph([
+        Stage("plan", lambda post: 3, inputs=["post"], outputs=["duration"]),
+        Stage("sludge", fail, inputs=["duration"], outputs=["sludge"]),
+        Stage("stack", record("stack"), inputs=["sludge"], outputs=["stack"]),
+    ], max_workers=2)
+    try:
+        graph.run({"post": "p"})
+        raised = None
+    except RuntimeError as e:
+        raised = str(e)
+    passed = check("stage error reaches the caller", raised == "sludge broke", raised)
+    return passed & check("dependents of a failed stage never run", ran == [], ran)
+
+
+def test_invalid_graphs():
+    passed = True
+    try:
+        StageGraph([
+            Stage("a", lambda: 1, outputs=["x"]),
+            Stage("b", lambda: 2, outputs=["x"]),
+        ])
+        passed &= check("duplicate producers rejected", False)
+    except ValueError:
+        passed &= check("duplicate producers rejected", True)
+
+    graph = StageGraph([Stage("a", lambda missing: 1, inputs=["missing"], outputs=["x"])])
+    try:
+        graph.run({})
+        passed &= check("missing inputs rejected", False)
+    except ValueError:
+        passed &= check("missing inputs rejected", True)
+
+    graph = StageGraph([
+        Stage("a", lambda y: 1, inputs=["y"], outputs=["x"]),
+        Stage("b", lambda x: 2, inputs=["x"], outputs=["y"]),
+    ])
+    try:
+        graph.run({})
+        passed &= check("cycles rejected", False)
+    except ValueError:
+        passed &= check("cycles rejected", True)
+    return passed
+
+
+def main():
+    passed = True
+    for test in (
+        test_order_and_concurrency,
+        test_single_worker,
+        test_initial_values_skip_stages,
+        test_failure_stops_dependents,
+        test_invalid_graphs,
+    ):
+        passed &= test()
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
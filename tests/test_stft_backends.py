@@ -0,0 +1,82 @@
+"""
+Benchmark the decoder's STFT backends (torch, custom, fft) at Kokoro's n_fft/hop and check them against torch.stft/istft.
+With --record, saves the fastest exact backend as this machine's DEFAULT_STFT_BACKEND (see istftnet.STFT_BENCHMARK_PATH).
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from narration.kokoro.istftnet import STFT_BACKENDS, DEFAULT_STFT_BACKEND, STFT_BENCHMARK_PATH, record_stft_benchmark
+
+# gen_istft_n_fft / gen_istft_hop_size from Kokoro-82M's config
+N_FFT = 20
+HOP = 5
+SAMPLE_RATE = 24000
+CHUNK_SECONDS = [2, 8, 20]
+REPEATS = 10
+# custom approximates torch (replicate padding, no window-envelope normalization
+# in the inverse), so it is timed and its difference reported but not checked
+EXACT_BACKENDS = ["torch", "fft"]
+
+
+def time_it(fn, *args):
+    fn(*args)
+    t = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn(*args)
+    return (time.perf_counter() - t) / REPEATS * 1000, result
+
+
+def max_diff(a, b):
+    if a.shape != b.shape:
+        return float("inf")
+    return (a - b).abs().max().item()
+
+
+def main():
+    torch.manual_seed(0)
+    backends = {name: cls(filter_length=N_FFT, hop_length=HOP, win_length=N_FFT) for name, cls in STFT_BACKENDS.items()}
+    reference = backends["torch"]
+    totals = {name: 0.0 for name in backends}
+    passed = True
+
+    print(f"{'seconds':>7} {'backend':>8} {'stft ms':>8} {'istft ms':>9} {'mag diff':>9} {'wave diff':>10}")
+    with torch.inference_mode():
+        for seconds in CHUNK_SECONDS:
+            # har_source is [B, samples]; the decoder's spec/phase are [B, N_FFT//2+1, frames]
+            signal = torch.randn(1, seconds * SAMPLE_RATE)
+            magnitude = torch.rand(1, N_FFT // 2 + 1, seconds * SAMPLE_RATE // HOP + 1)
+            phase = (torch.rand_like(magnitude) * 2 - 1) * torch.pi
+            ref_mag, _ = reference.transform(signal)
+            ref_wave = reference.inverse(magnitude, phase)
+
+            for name, stft in backends.items():
+                stft_ms, (mag, _) = time_it(stft.transform, signal)
+                istft_ms, wave = time_it(stft.inverse, magnitude, phase)
+                mag_diff = max_diff(mag, ref_mag)
+                wave_diff = max_diff(wave, ref_wave)
+                totals[name] += stft_ms + istft_ms
+                if name in EXACT_BACKENDS and (mag_diff > 1e-3 or wave_diff > 1e-3):
+                    passed = False
+                print(f"{seconds:>7} {name:>8} {stft_ms:>8.2f} {istft_ms:>9.2f} {mag_diff:>9.2e} {wave_diff:>10.2e}")
+
+    fastest = min(totals, key=totals.get)
+    print(f"\nFastest here: {fastest} (default is {DEFAULT_STFT_BACKEND})")
+    if "--record" in sys.argv[1:]:
+        # only backends that match torch.stft/istft can become the default
+        exact = min(EXACT_BACKENDS, key=totals.get)
+        if passed:
+            record_stft_benchmark(exact, {name: round(ms, 3) for name, ms in totals.items()})
+            print(f"Recorded {exact} as the default in {STFT_BENCHMARK_PATH}")
+        else:
+            print("Not recording: a backend failed its check")
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Check the unpadded fast paths of TextEncoder, DurationEncoder and ProsodyPredictor against their pack/pad paths, and time both."""
+
+import sys
+import os
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from narration.kokoro.modules import TextEncoder, ProsodyPredictor
+
+# Kokoro-82M's config
+HIDDEN_DIM = 512
+STYLE_DIM = 128
+N_LAYER = 3
+N_TOKEN = 178
+KERNEL_SIZE = 5
+MAX_DUR = 50
+TOKEN_COUNTS = [32, 128, 510]
+REPEATS = 10
+MAX_DIFF = 1e-5
+
+
+def time_it(fn, *args):
+    fn(*args)
+    t = time.perf_counter()
+    for _ in range(REPEATS):
+        result = fn(*args)
+    return (time.perf_counter() - t) / REPEATS * 1000, result
+
+
+def main():
+    torch.manual_seed(0)
+    text_encoder = TextEncoder(HIDDEN_DIM, KERNEL_SIZE, N_LAYER, N_TOKEN).eval()
+    predictor = ProsodyPredictor(STYLE_DIM, HIDDEN_DIM, N_LAYER, MAX_DUR).eval()
+    passed = True
+
+    def encode_text(input_ids, lengths, mask):
+        return text_encoder(input_ids, lengths, mask)
+
+    def encode_durations(d_en, style, lengths, mask):
+        d = predictor.text_encoder(d_en, style, lengths, mask)
+        alignment = torch.eye(d.shape[1]).unsqueeze(0)
+        return d, predictor(d_en, style, lengths, alignment, mask)[0]
+
+    print(f"{'tokens':>6} {'module':<16} {'packed ms':>10} {'dense ms':>9} {'max diff':>9}")
+    with torch.no_grad():
+        for tokens in TOKEN_COUNTS:
+            input_ids = torch.randint(1, N_TOKEN, (1, tokens))
+            lengths = torch.tensor([tokens])
+            mask = torch.zeros(1, tokens, dtype=torch.bool)
+            d_en = torch.randn(1, HIDDEN_DIM, tokens)
+            style = torch.randn(1, STYLE_DIM)
+
+            cases = [
+                ("TextEncoder", encode_text, (input_ids, lengths, mask)),
+                ("Duration/Prosody", encode_durations, (d_en, style, lengths, mask)),
+            ]
+            for name, fn, args in cases:
+                with mock.patch("narration.kokoro.modules._is_unpadded", return_value=False):
+                    packed_ms, expected = time_it(fn, *args)
+                dense_ms, actual = time_it(fn, *args)
+                if not isinstance(expected, tuple):
+                    expected, actual = (expected,), (actual,)
+                diff = max((e - a).abs().max().item() for e, a in zip(expected, actual))
+                passed = passed and diff <= MAX_DIFF
+                print(f"{tokens:>6} {name:<16} {packed_ms:>10.2f} {dense_ms:>9.2f} {diff:>9.2e}")
+
+    print("PASSED" if passed else "FAILED")
+
+
+if __name__ == "__main__":
+    main()
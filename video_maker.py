@@ -2,7 +2,12 @@ print(f"Importing modules...")
 
 from src.transcription.transcriber_local import Transcriber
 from src.scraper.scraper import DataSaver
-from src.narration.narrarate import narrate
+from src.scraper.post_usage_history import PostUsageHistory
+from src.narration.tts_engine import NARRATION_VOICE
+from src.narration.narrarate import (
+    narrate, estimate_narration_duration, plan_narration, narration_output_path,
+    MAX_PAUSE_SECONDS,
+)
 from src.reddit_post_image.post_image_maker import make_reddit_post_image
 from src.video_editing.caption_maker import extract_word_timestamps_from_transcript
 
@@ -12,6 +17,7 @@ import random
 import time
 import uuid
 from src.sludge.sludge_video_extractor import Extractor
+from src.sludge.prefetch import prefetch_sludge_window, prefetch_files
 from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip
 import os
 import stat
@@ -24,7 +30,12 @@ from src.video_editing.video_editing_functions import (
     stack_videos_vertically,
     add_fade_background,
     add_audio_to_video,
+    evaluate_qa_report,
+    save_qa_report,
+    load_qa_report,
+    qa_report_path,
 )
+from src.pipeline.stage_graph import Stage, StageGraph
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
@@ -35,6 +46,9 @@ print(f"Successfully loaded all necessary support modules!")
 # When False: metadata generation runs after video is complete (original behavior)
 PARALLEL_METADATA_GENERATION = True
 
+# Max stages of a single video that run at once (see VIDEO_STAGES)
+VIDEO_STAGE_WORKERS = 3
+
 SUBREDDIT_ICON_URL = "https://www.redditinc.com/assets/images/site/reddit-logo.png"
 VIDEO_DIMS = (1080, 1920)
 SLOP_VIDEO_VERTICAL_PERCENT = 0.4
@@ -47,31 +61,17 @@ SUB_SLUDGE_VIDEO_DIMS = (
 )
 
 
-class PostUsageHistory:
-    def __init__(self):
-        self.fp = "data/post_usage_history.txt"
-
-        if not os.path.exists(self.fp):
-            with open(self.fp, "w") as f:
-                pass
-
-    def add_post(self, post_url):
-        with open(self.fp, "a") as f:
-            f.write(f"{post_url}\n")
-
-    def get_all_posts(self):
-        with open(self.fp, "r") as f:
-            return [line.strip() for line in f if line.strip()]
-
-    def post_exists(self, post_url):
-        existing_posts = self.get_all_posts()
-        if post_url in existing_posts:
-            return True
-        return False
-
-
 MIN_CONTENT_LENGTH = 300
 MAX_CONTENT_LENGTH = 1500
+
+# Assets every render reads, warmed alongside the next sludge window
+PREFETCH_ASSET_PATHS = [
+    "fonts/NotoSans-Bold.ttf",
+    "fonts/NotoSans-Regular.ttf",
+    "fonts/NotoSans-SemiBold.ttf",
+    "reddit_assets/images/base_post_image.png",
+    "reddit_assets/images/pfp_bw.png",
+]
 MIN_ENGAGEMENT = 4
 MIN_REPOST_QUALITY = 6
 MIN_NARRATIVE_CURIOSITY = 4
@@ -225,9 +225,10 @@ def delete_file(file):
             subprocess.run(["sudo", "rm", "-f", str(file)], check=False)
 
 
-def prepare_post_data(output_dir):
+def prepare_post_data(output_dir, post_url=None):
     """
     Steps 1-2: Load scraped data and create post image.
+    If post_url is given, only that post is considered.
     Returns (post_image_save_path, post_data) or (None, None) on failure.
     """
     temp_folder_name = r"temp"
@@ -238,6 +239,8 @@ def prepare_post_data(output_dir):
     t = time.time()
     reddit_data_manager = DataSaver()
     posts = reddit_data_manager.get_all_posts()
+    if post_url:
+        posts = [post for post in posts if post.url == post_url]
     print(f"[1] Loaded {len(posts)} posts ({time.time()-t:.1f}s)")
 
     # create the static reddit post
@@ -255,79 +258,197 @@ def prepare_post_data(output_dir):
     return post_image_save_path, post_data
 
 
-def create_video_from_post(post_image_save_path, post_data):
-    """
-    Steps 3-8: Create video from post image and data.
-    Returns narrated_video_path or False on failure.
-    """
-    # make a narration of this post
+# Shorts length limit; longer narrations are sped up to fit
+MAX_NARRATION_DURATION = 60
+# Cap pauses in the narration audio at MAX_PAUSE_SECONDS (see
+# src/narration/pause_compaction.py). Every second removed is a second less
+# to scroll, extract, blur and encode. The narration stage estimates the
+# compacted length from the predicted word timings and fits the speed to
+# it; the "vocode" stage compacts the audio, still overlapping the video
+# stages.
+COMPACT_NARRATION_PAUSES = True
+
+
+def generate_narration_plan(post_data):
+    # predict the narration's exact length; the audio is vocoded separately
     post_title = post_data["title"]
     post_text = post_data["content"]
     narration_content = f"{post_title}. {post_text}"
 
-    print(f"[3] Generating narration...")
+    print(f"[3] Planning narration...")
     t = time.time()
-    narration_audio_file_path, narration_duration = narrate(
-        "jf_alpha", narration_content
+    narration_plan = plan_narration(
+        NARRATION_VOICE, narration_content, MAX_NARRATION_DURATION,
+        max_pause=MAX_PAUSE_SECONDS if COMPACT_NARRATION_PAUSES else None,
     )
-    print(f"[3] Narration: {narration_duration}s audio ({time.time()-t:.1f}s)")
+    print(f"[3] Narration: {narration_plan.planned_duration:.2f}s audio planned ({time.time()-t:.1f}s)")
+    return narration_plan, narration_plan.planned_duration
+
 
+def vocode_narration(narration_plan):
+    print(f"[3] Vocoding narration...")
+    t = time.time()
+    narration_audio_file_path = narration_output_path(NARRATION_VOICE)
+    # compacts the pauses too, when the plan has a max_pause
+    narration_plan.vocode().save(narration_audio_file_path)
+    print(f"[3] Done ({time.time()-t:.1f}s)")
+    return narration_audio_file_path
+
+
+def create_scrolling_video(post_image_path, narration_duration):
     # make that a scrolling video
     print(f"[4] Creating scrolling video...")
     t = time.time()
     scrolling_reddit_post_video_path = r"temp/reddit_post_scrolling_video.mp4"
     scroll_image(
-        image_path=post_image_save_path,
+        image_path=post_image_path,
         out_video_path=scrolling_reddit_post_video_path,
         scroll_duration=narration_duration,
         height=SCROLLING_REDDIT_POST_HEIGHT,
         width=VIDEO_DIMS[0],
     )
     print(f"[4] Done ({time.time()-t:.1f}s)")
+    return scrolling_reddit_post_video_path
+
+
+def plan_sludge_window(narration_text=None, post_image_path=None):
+    """
+    Chooses the sludge source and window for an upcoming render and starts
+    warming the page cache for it, plus the post image and shared assets.
+    The window is sized from an estimate of the narration length; pass it
+    to create_video_from_post, which reuses it if the real narration fits.
+    """
+    if narration_text:
+        estimated_duration = estimate_narration_duration(narration_text)
+    else:
+        estimated_duration = estimate_narration_duration("x" * MAX_CONTENT_LENGTH)
+
+    try:
+        window = Extractor().choose_window(estimated_duration)
+        if window:
+            prefetch_sludge_window(window)
+        prefetch_files(PREFETCH_ASSET_PATHS + [post_image_path])
+    except Exception as e:
+        print(f"[!] Prefetch planning failed: {e}")
+        return None
+    return window
+
 
+def extract_sub_sludge_video(narration_duration, sludge_window):
     # craft the sub sludge video
     print(f"[5] Extracting sludge video...")
     t = time.time()
     sub_sludge_extractor = Extractor()
     sub_sludge_video_path = r"temp/sub_sludge_video.mp4"
     sub_sludge_extractor.get_random_sludge_video(
-        narration_duration, sub_sludge_video_path, SUB_SLUDGE_VIDEO_DIMS
+        narration_duration, sub_sludge_video_path, SUB_SLUDGE_VIDEO_DIMS,
+        window=sludge_window,
     )
     print(f"[5] Done ({time.time()-t:.1f}s)")
+    return sub_sludge_video_path
+
 
+def stack_scroll_and_sludge(scrolling_video_path, sub_sludge_video_path):
     # put the videos on top of each other
     print(f"[6] Stacking videos...")
     t = time.time()
     stacked_video_path = r"temp/stacked_video.mp4"
     stack_videos_vertically(
-        scrolling_reddit_post_video_path, sub_sludge_video_path, stacked_video_path
+        scrolling_video_path, sub_sludge_video_path, stacked_video_path
     )
     print(f"[6] Done ({time.time()-t:.1f}s)")
+    return stacked_video_path
+
+
+def add_background(stacked_video_path, sub_sludge_video_path):
+    # black/freeze/silence detection rides along with the final encodes
+    qa_report = {}
 
     # add fade background with pad
     print(f"[7] Adding faded background...")
     t = time.time()
     stacked_video_with_background_path = r"temp/stacked_video_with_background.mp4"
-    add_fade_background(
+    if not add_fade_background(
         stacked_video_path, sub_sludge_video_path, stacked_video_with_background_path,
         output_dims=VIDEO_DIMS,
-    )
+        qa_report=qa_report,
+    ):
+        qa_report.setdefault("encode_errors", []).append("add_fade_background")
     print(f"[7] Done ({time.time()-t:.1f}s)")
+    return stacked_video_with_background_path, qa_report
 
+
+def add_narration_audio(background_video_path, narration_audio_file_path, qa_report):
     # add narration audio
     print(f"[8] Adding narration audio...")
     t = time.time()
     narrated_video_path = "temp/narrated_final_video.mp4"
-    add_audio_to_video(
-        video_path=stacked_video_with_background_path,
+    if not add_audio_to_video(
+        video_path=background_video_path,
         audio_path=narration_audio_file_path,
         out_video_path=narrated_video_path,
-    )
+        qa_report=qa_report,
+    ):
+        qa_report.setdefault("encode_errors", []).append("add_audio_to_video")
     print(f"[8] Done ({time.time()-t:.1f}s)")
 
+    evaluate_qa_report(qa_report)
+    save_qa_report(narrated_video_path, qa_report)
+    if qa_report["passed"]:
+        print(f"[QA] Passed")
+    else:
+        print(f"[QA] Failed: {', '.join(qa_report['failures'])}")
+
     return narrated_video_path
 
 
+# Steps 3-8 as a dependency graph. Independent stages run at the same time:
+# the scroll video alongside sludge extraction, since both only need the
+# narration duration. The duration comes from the narration plan, so both
+# start while the audio is still being vocoded. The post image (step 2)
+# comes from prepare_post_data, which renders it to pick a usable post.
+VIDEO_STAGES = [
+    Stage("narration", generate_narration_plan,
+          inputs=["post_data"], outputs=["narration_plan", "narration_duration"]),
+    Stage("vocode", vocode_narration,
+          inputs=["narration_plan"], outputs=["narration_audio_path"]),
+    Stage("scroll", create_scrolling_video,
+          inputs=["post_image_path", "narration_duration"], outputs=["scrolling_video_path"]),
+    Stage("sludge", extract_sub_sludge_video,
+          inputs=["narration_duration", "sludge_window"], outputs=["sub_sludge_video_path"]),
+    Stage("stack", stack_scroll_and_sludge,
+          inputs=["scrolling_video_path", "sub_sludge_video_path"], outputs=["stacked_video_path"]),
+    Stage("background", add_background,
+          inputs=["stacked_video_path", "sub_sludge_video_path"], outputs=["background_video_path", "qa_report"]),
+    Stage("audio", add_narration_audio,
+          inputs=["background_video_path", "narration_audio_path", "qa_report"], outputs=["narrated_video_path"]),
+]
+
+
+def create_video_from_post(post_image_save_path, post_data, register_thread_callback=None, on_event=None, sludge_window=None):
+    """
+    Steps 3-8: Create video from post image and data (see prepare_post_data).
+    sludge_window: window chosen (and prefetched) ahead of time by
+    plan_sludge_window. Without one it is planned here, so the sludge read
+    warms up while narration runs.
+    Returns narrated_video_path.
+    """
+    if sludge_window is None:
+        sludge_window = plan_sludge_window(
+            f"{post_data['title']}. {post_data['content']}", post_image_save_path
+        )
+
+    initial = {
+        "post_data": post_data,
+        "post_image_path": post_image_save_path,
+        "sludge_window": sludge_window,
+    }
+
+    graph = StageGraph(VIDEO_STAGES, max_workers=VIDEO_STAGE_WORKERS)
+    values = graph.run(initial, thread_callback=register_thread_callback, on_event=on_event)
+    return values["narrated_video_path"]
+
+
 def create_stacked_reddit_scroll_video(output_dir):
     """
     Full video creation pipeline (steps 1-8).
@@ -375,12 +496,19 @@ def compile_video_and_metadata(video_path, metadata_dict, output_folder):
     new_video_path = os.path.join(subfolder_path, "video.mp4")
     os.rename(video_path, new_video_path)
 
+    # carry the render's QA verdict along so uploaders can skip broken videos
+    qa_report = load_qa_report(video_path)
+    if qa_report is not None:
+        metadata_dict["qa"] = qa_report
+        os.remove(qa_report_path(video_path))
+
     metadata_file_path = os.path.join(subfolder_path, "metadata.json")
     with open(metadata_file_path, "w") as f:
         json.dump(metadata_dict, f, indent=4)
 
     print(f"[FINAL] Saved to {subfolder_name}/")
     print("="*70)
+    return subfolder_path
 
 
 from src.video_editing.video_editing_functions import (
@@ -470,6 +598,10 @@ def create_all_stacked_reddit_scroll_videos(output_dir="final_vids", stop_flag=N
         stop_flag: Threading event to signal stop
         register_thread_callback: Optional callback to register child threads for GUI output routing
     """
+    # each render's sludge window is planned (and its reads warmed) while
+    # the render before it runs
+    window_planner = ThreadPoolExecutor(max_workers=1)
+    next_window = window_planner.submit(plan_sludge_window)
     while True:
         if stop_flag and stop_flag.is_set():
             print("[!] Stop flag detected, stopping video generation...")
@@ -490,6 +622,9 @@ def create_all_stacked_reddit_scroll_videos(output_dir="final_vids", stop_flag=N
             if stop_flag and stop_flag.is_set():
                 break
 
+            sludge_window = next_window.result()
+            next_window = window_planner.submit(plan_sludge_window)
+
             if PARALLEL_METADATA_GENERATION:
                 # Run video creation (steps 3-8) and metadata generation in parallel
                 narrated_video_path = None
@@ -498,7 +633,11 @@ def create_all_stacked_reddit_scroll_videos(output_dir="final_vids", stop_flag=N
                 def video_task():
                     if register_thread_callback:
                         register_thread_callback()
-                    return create_video_from_post(post_image_save_path, post_data)
+                    return create_video_from_post(
+                        post_image_save_path, post_data,
+                        register_thread_callback=register_thread_callback,
+                        sludge_window=sludge_window,
+                    )
 
                 def metadata_task():
                     if register_thread_callback:
@@ -522,7 +661,11 @@ def create_all_stacked_reddit_scroll_videos(output_dir="final_vids", stop_flag=N
 
             else:
                 # Sequential execution (original behavior)
-                narrated_video_path = create_video_from_post(post_image_save_path, post_data)
+                narrated_video_path = create_video_from_post(
+                    post_image_save_path, post_data,
+                    register_thread_callback=register_thread_callback,
+                    sludge_window=sludge_window,
+                )
 
                 total_time = time.time() - video_start
                 print(f"[SUCCESS] Video created in {total_time:.1f}s")
@@ -545,6 +688,7 @@ def create_all_stacked_reddit_scroll_videos(output_dir="final_vids", stop_flag=N
         except Exception as e:
             print(f"[!] Error creating video: {e}")
             break
+    window_planner.shutdown(wait=False)
 
 
 if __name__ == "__main__":